@@ -1,6 +1,8 @@
-import requests
-import re
 import os
+import re
+
+import httpclient
+from m3u import attributes_end, iter_entries, parse_file
 
 PLAYLIST_URLS = [
     "https://mc-o0of718lw0.bunny.run/playlist.m3u8"
@@ -18,7 +20,7 @@ group_regex = re.compile(r'group-title="([^"]*)"')
 
 def fetch_playlist(url):
     """Fetch playlist text and split into lines."""
-    r = requests.get(url)
+    r = httpclient.get(url)
     r.raise_for_status()
     return r.text.splitlines()
 
@@ -27,48 +29,34 @@ def get_existing_urls(file_path):
     urls = set()
     if not os.path.exists(file_path):
         return urls
-    with open(file_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    for i, line in enumerate(lines):
-        if line.startswith("#EXTINF") and i + 1 < len(lines):
-            urls.add(lines[i + 1].strip())
+    for entry in parse_file(file_path):
+        if entry.extinf:
+            urls.add(entry.url)
     return urls
 
-def remap_group_title(line):
+def remap_group_title(entry):
     """Prefix allowed group-titles with 'AriaPlus -', keep all other metadata intact."""
-    match = group_regex.search(line)
-    if not match:
+    line = entry.extinf
+    match = group_regex.search(line, 0, attributes_end(line))
+    if not match or match.group(1) not in ALLOWED_GROUPS:
         return None
-    original_group = match.group(1)
-    if original_group not in ALLOWED_GROUPS:
-        return None
-
-    new_line = re.sub(
-        r'group-title="[^"]*"',
-        f'group-title="AriaPlus - {original_group}"',
-        line
-    )
-    return new_line
+    # one search; only the value is replaced, in place
+    entry.extinf = f"{line[:match.start(1)]}AriaPlus - {match.group(1)}{line[match.end(1):]}"
+    return entry.extinf
 
 def process_playlist(lines, existing_urls):
     """Filter + remap channels, skipping already existing URLs."""
     output_lines = []
-    skip_next = False
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if line.startswith("#EXTINF:"):
-            new_line = remap_group_title(line)
-            if not new_line:
-                skip_next = True
-                continue
-            # Check next line for URL
-            if i + 1 < len(lines):
-                url_line = lines[i + 1].strip()
-                if url_line not in existing_urls:
-                    output_lines.append(new_line)
-                    output_lines.append(url_line)
-                    existing_urls.add(url_line)
-            skip_next = True
+    for entry in iter_entries(lines):
+        if not entry.extinf:
+            continue
+        new_line = remap_group_title(entry)
+        if not new_line:
+            continue
+        if entry.url not in existing_urls:
+            output_lines.append(new_line)
+            output_lines.append(entry.url)
+            existing_urls.add(entry.url)
     return output_lines
 
 def main():
@@ -0,0 +1,132 @@
+import gc
+import re
+import sys
+import time
+
+from m3u import Entry, attributes_end, edit_extinf, parse_file
+
+SOURCES = ["PH.m3u", "phglobe.m3u", "Pixelsports.m3u8", "converge2.m3u", "NBA HOMECOURT.m3u"]
+TARGET_ENTRIES = 20_000
+ROUNDS = 15
+
+
+# ---------- REGEX ON THE RAW LINE (previous behaviour) ----------
+def regex_merge(extinfs):
+    """drewlivemerge/tvpassplaylist: group-title searched twice, title via rsplit."""
+    keyed = []
+    for extinf in extinfs:
+        group_match = re.search(r'group-title="([^"]+)"', extinf)
+        group = group_match.group(1) if group_match else "Other"
+        try:
+            title = extinf.rsplit(',', 1)[1].strip()
+        except IndexError:
+            title = ""
+        keyed.append((group.lower(), title.lower(), extinf, (), ""))
+    for _, _, extinf, _, _ in sorted(keyed):
+        group_match = re.search(r'group-title="([^"]+)"', extinf)
+        group = group_match.group(1) if group_match else "Other"
+
+
+def regex_remap(extinfs):
+    """aria.remap_group_title: search, then sub."""
+    for extinf in extinfs:
+        match = re.search(r'group-title="([^"]*)"', extinf)
+        if match:
+            re.sub(r'group-title="[^"]*"', f'group-title="AriaPlus - {match.group(1)}"', extinf)
+
+
+def regex_make_extinf(extinfs):
+    """combine.make_extinf: sub on the attribute string."""
+    for extinf in extinfs:
+        head, _, title = extinf.rpartition(",")
+        attrs = head.split(" ", 1)[1] if " " in head else ""
+        if 'group-title=' in attrs:
+            attrs = re.sub(r'group-title=".*?"', 'group-title="TCL+"', attrs)
+        else:
+            attrs = f'{attrs} group-title="TCL+"'.strip()
+        f"#EXTINF:-1{(' ' + attrs) if attrs else ''},{title}"
+
+
+# ---------- ENTRY (lookups cached, values edited in place) ----------
+# Entries come as the scripts have them at that point.
+def map_merge(entries):
+    """drewlivemerge/tvpassplaylist: group and title read once, group kept for the write."""
+    keyed = []
+    for entry in entries:
+        group = entry.get("group-title") or "Other"
+        keyed.append((group.lower(), entry.title.lower(), entry.extinf, entry.headers, entry.url, group))
+    for _, _, extinf, _, _, group in sorted(keyed):
+        pass
+
+
+GROUP_RE = re.compile(r'group-title="([^"]*)"')
+
+
+def map_remap(entries):
+    """aria.remap_group_title: one compiled search, the value spliced in."""
+    for entry in entries:
+        line = entry.extinf
+        match = GROUP_RE.search(line, 0, attributes_end(line))
+        if match:
+            entry.extinf = f"{line[:match.start(1)]}AriaPlus - {match.group(1)}{line[match.end(1):]}"
+
+
+def map_make_extinf(entries):
+    """combine.make_extinf; combine has read every title by then (dedup key, sort)."""
+    for entry in entries:
+        edit_extinf(entry.extinf, {"group-title": "TCL+"}, None if entry.title else "Unknown", "-1",
+                    entry.attributes_end())
+
+
+def fresh_entries(extinfs):
+    return [Entry(extinf, (), "") for extinf in extinfs]
+
+
+def titled_entries(extinfs):
+    entries = fresh_entries(extinfs)
+    for entry in entries:
+        entry.title
+    return entries
+
+
+def timed(func, data):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func(data)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def best_of(regex_func, map_func, extinfs, make_entries):
+    """Best time of each side; rounds alternate so machine noise hits both."""
+    regex_best = map_best = float("inf")
+    for _ in range(ROUNDS):
+        regex_best = min(regex_best, timed(regex_func, extinfs))
+        map_best = min(map_best, timed(map_func, make_entries(extinfs)))
+    return regex_best, map_best
+
+
+def main():
+    sources = sys.argv[1:] or SOURCES
+    extinfs = [e.extinf for path in sources for e in parse_file(path) if e.extinf]
+    if not extinfs:
+        print("No #EXTINF lines found.")
+        return
+    extinfs = (extinfs * (TARGET_ENTRIES // len(extinfs) + 1))[:TARGET_ENTRIES]
+
+    print(f"{len(extinfs)} entries, best of {ROUNDS} rounds\n")
+    for name, regex_func, map_func, make_entries in (
+        ("merge (group + title, sort, regroup)", regex_merge, map_merge, fresh_entries),
+        ("remap group-title (aria)", regex_remap, map_remap, fresh_entries),
+        ("rebuild #EXTINF (combine)", regex_make_extinf, map_make_extinf, titled_entries),
+    ):
+        regex_time, map_time = best_of(regex_func, map_func, extinfs, make_entries)
+        print(f"{name}")
+        print(f"  regex on raw line: {regex_time * 1000:8.1f} ms")
+        print(f"  entry:             {map_time * 1000:8.1f} ms  ({regex_time / map_time:.2f}x)\n")
+
+
+if __name__ == "__main__":
+    main()
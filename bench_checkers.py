@@ -0,0 +1,101 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from hlsorigin import BASE_PORT, PROFILES, generate_playlist
+from m3u import parse_file
+from vidaa import MAX_TTFB, MIN_SPEED_KBPS
+
+HERE = Path(__file__).resolve().parent
+SIZES = (1000, 10000)
+RUN_TIMEOUT = 3600
+
+
+# ---------- CHECKERS ----------
+def is_fast_host(name):
+    profile = PROFILES[name]
+    return not profile.blocked and profile.latency <= MAX_TTFB and profile.kbps >= MIN_SPEED_KBPS
+
+
+# script -> should this (host profile, stream fate) be kept?
+CHECKERS = {
+    "phfilter": lambda name, fate: fate in ("ok", "bad_type"),
+    "nbalivefilter": lambda name, fate: fate == "ok",
+    "vidaa": lambda name, fate: fate == "ok" and is_fast_host(name),
+    "supersonic": lambda name, fate: not PROFILES[name].blocked,
+}
+
+
+# ---------- RUNNER ----------
+def origin_stats(base_port, reset=False):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{base_port}/_stats", method="POST" if reset else "GET"
+    )
+    with urllib.request.urlopen(request) as r:
+        return json.load(r)
+
+
+def run_checker(checker, playlist, truth, base_port):
+    """Runs the checker's CLI in a scratch directory so its probe cache starts cold."""
+    with tempfile.TemporaryDirectory() as cwd:
+        output = Path(cwd) / "out.m3u"
+        origin_stats(base_port, reset=True)
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(HERE / f"{checker}.py"), str(playlist), str(output)],
+            cwd=cwd, stdout=subprocess.DEVNULL, check=True, timeout=RUN_TIMEOUT,
+        )
+        seconds = time.perf_counter() - start
+        stats = origin_stats(base_port)
+        kept = {entry.url for entry in parse_file(output)} if output.exists() else set()
+
+    expected = CHECKERS[checker]
+    false_kept = sum(1 for url, t in truth.items() if url in kept and not expected(*t))
+    false_dropped = sum(1 for url, t in truth.items() if url not in kept and expected(*t))
+    return seconds, stats, false_kept, false_dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stream checkers against hlsorigin.py.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--checkers", nargs="+", choices=CHECKERS, default=list(CHECKERS))
+    parser.add_argument("--base-port", type=int, default=BASE_PORT)
+    args = parser.parse_args()
+
+    origin = subprocess.Popen(
+        [sys.executable, str(HERE / "hlsorigin.py"), "--base-port", str(args.base_port)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        for line in origin.stdout:
+            if line.startswith("✅"):
+                break
+
+        print(f"{'entries':>7} {'checker':<14} {'entries/s':>9} {'seconds':>8} {'MB read':>8} "
+              f"{'requests':>9} {'accuracy':>9} {'false +':>8} {'false -':>8}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                playlist = Path(tmp) / f"synthetic_{size}.m3u"
+                truth = generate_playlist(playlist, size, args.base_port)
+
+                for checker in args.checkers:
+                    seconds, stats, false_kept, false_dropped = run_checker(
+                        checker, playlist, truth, args.base_port
+                    )
+                    accuracy = 1 - (false_kept + false_dropped) / size
+                    print(f"{size:>7} {checker:<14} {size / seconds:>9.1f} {seconds:>8.1f} "
+                          f"{stats['bytes'] / 1e6:>8.1f} {stats['requests']:>9} "
+                          f"{accuracy:>9.1%} {false_kept:>8} {false_dropped:>8}", flush=True)
+    finally:
+        origin.terminate()
+        origin.wait()
+
+
+if __name__ == "__main__":
+    main()
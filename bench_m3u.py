@@ -0,0 +1,97 @@
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from m3u import parse_file, split_extinf
+
+SOURCE = "SuperS.m3u"
+SCALES = (1, 10, 50)
+GROUP_RE = re.compile(r'group-title="([^"]*)"')
+
+
+# ---------- METHODS ----------
+# Every method extracts the (title, group-title, url) a filter stage needs.
+def read_text_splitlines(path):
+    """The loop vidaa.py / supersonic.py used before the shared parser."""
+    lines = Path(path).read_text(encoding="utf-8", errors="ignore").splitlines()
+    entries = []
+    extinf, vlcopts = [], []
+    for line in lines:
+        if line.startswith("#EXTINF"):
+            extinf = [line]
+        elif line.startswith("#EXTVLCOPT"):
+            vlcopts.append(line)
+        elif line.startswith(("http://", "https://")):
+            entries.append((extinf.copy(), vlcopts.copy(), line.strip()))
+            extinf.clear()
+            vlcopts.clear()
+    count = 0
+    for extinf, _, url in entries:
+        if extinf:
+            group = GROUP_RE.search(extinf[0])
+            fields = (extinf[0].split(",", 1)[-1].strip(), group.group(1) if group else "", url)
+            count += 1
+    return count
+
+
+def streaming_parser(path):
+    count = 0
+    for entry in parse_file(path):
+        if entry.extinf:
+            _, attributes, title = split_extinf(entry.extinf)
+            group = GROUP_RE.search(attributes)
+            fields = (title, group.group(1) if group else "", entry.url)
+            count += 1
+    return count
+
+
+METHODS = {
+    "read_text": read_text_splitlines,
+    "parse_file": streaming_parser,
+}
+
+
+# ---------- RUNNER ----------
+def run_one(method, path):
+    """Runs in a fresh interpreter so ru_maxrss belongs to this method only."""
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    count = METHODS[method](path)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{count} {elapsed:.4f} {(peak_rss - base_rss) / 1024:.1f}")
+
+
+def main():
+    source = Path(sys.argv[1] if len(sys.argv) > 1 else SOURCE)
+    body = source.read_bytes().split(b"\n", 1)[1].rstrip(b"\n") + b"\n"
+
+    print(f"Benchmarking against {source} ({len(body) / 1e6:.1f} MB per copy)\n")
+    print(f"{'scale':>5} {'method':<11} {'entries':>9} {'seconds':>9} {'peak RSS MB':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in SCALES:
+            path = Path(tmp) / f"catalog_x{scale}.m3u"
+            with open(path, "wb") as f:
+                f.write(b"#EXTM3U\n")
+                for _ in range(scale):
+                    f.write(body)
+
+            for method in METHODS:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--run", method, str(path)],
+                    capture_output=True, text=True, check=True,
+                ).stdout.split()
+                count, seconds, rss = out
+                print(f"{scale:>5} {method:<11} {count:>9} {float(seconds):>9.3f} {float(rss):>12.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,273 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+# ---------- CONFIG ----------
+POOL_SIZE = 4               # browser contexts working at once
+RECYCLE_AFTER = 25          # navigations before a context is replaced
+MAX_BROWSER_RSS_MB = 1500   # browser memory that makes released contexts recycle
+BLANK = "about:blank"
+
+
+def browser_rss_mb(root=None):
+    """
+    Resident memory of every process below this one (Playwright driver and
+    browser), read from /proc. 0 where /proc is not available.
+    """
+    root = root or os.getpid()
+    children, rss = {}, {}
+    try:
+        page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+        for pid in filter(str.isdigit, os.listdir("/proc")):
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rpartition(")")[2].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(pid))
+            rss[int(pid)] = int(fields[21]) * page_kb
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+    total, stack = 0, list(children.get(root, []))
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total / 1024
+
+
+class Slot:
+    """One pooled context, its working page and how far it has been used."""
+
+    __slots__ = ("context", "page", "navigations")
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.navigations = 0
+        page.on("framenavigated", self._navigated)
+
+    def _navigated(self, frame):
+        if frame.parent_frame is None and frame.url != BLANK:
+            self.navigations += 1
+
+
+class PoolStats:
+    """Counters shared by the async and sync pools."""
+
+    def __init__(self, recycle_after, max_rss_mb):
+        self.recycle_after = recycle_after
+        self.max_rss_mb = max_rss_mb
+        self.jobs = 0
+        self.recycled = {"navigations": 0, "memory": 0, "crash": 0}
+        self.failed_releases = 0    # no fresh context could be made (browser gone?)
+        self.peak_rss_mb = 0.0
+
+    def recycle_reason(self, slot, failed):
+        """Why a released slot needs a fresh context, or None to just reset it."""
+        self.jobs += 1
+        if failed or slot.page.is_closed():
+            return "crash"
+        if slot.navigations >= self.recycle_after:
+            return "navigations"
+        rss = browser_rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if self.max_rss_mb and rss > self.max_rss_mb:
+            return "memory"
+        return None
+
+    def summary(self):
+        recycled = ", ".join(f"{n} after {r}" for r, n in self.recycled.items() if n) or "none"
+        failed = f", {self.failed_releases} failed releases" if self.failed_releases else ""
+        return (f"♻️ Context pool: {self.jobs} jobs, contexts recycled: {recycled}{failed}; "
+                f"peak browser RSS {self.peak_rss_mb:.0f} MB")
+
+
+class ContextPool(PoolStats):
+    """
+    `size` isolated browser contexts with one warm page each (async API). A
+    worker borrows a page for one job, so popups and cookies of parallel
+    jobs never mix. On release the page is reset (popups closed, cookies
+    cleared, back to about:blank); its context is replaced instead after
+    `recycle_after` navigations, when the browser's RSS is over
+    `max_rss_mb`, or when the job crashed the page.
+    """
+
+    def __init__(self, browser, size=POOL_SIZE, setup=None, recycle_after=RECYCLE_AFTER,
+                 max_rss_mb=MAX_BROWSER_RSS_MB, **context_kwargs):
+        super().__init__(recycle_after, max_rss_mb)
+        self.browser = browser
+        self.size = size
+        self.setup = setup          # async callable run on every new context
+        self.context_kwargs = context_kwargs
+        self._slots = asyncio.Queue()
+        self._all = set()
+
+    async def _new_slot(self):
+        ctx = await self.browser.new_context(**self.context_kwargs)
+        if self.setup:
+            await self.setup(ctx)
+        slot = Slot(ctx, await ctx.new_page())
+        self._all.add(slot)
+        return slot
+
+    async def __aenter__(self):
+        for _ in range(self.size):
+            self._slots.put_nowait(await self._new_slot())
+        return self
+
+    async def __aexit__(self, *exc):
+        for slot in self._all:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+
+    async def _release(self, slot, failed):
+        reason = self.recycle_reason(slot, failed)
+        if reason is None:
+            try:
+                for other in slot.context.pages:
+                    if other is not slot.page:
+                        await other.close()
+                await slot.context.clear_cookies()
+                await slot.page.goto(BLANK)
+                return slot
+            except Exception:
+                reason = "crash"
+        self.recycled[reason] += 1
+        self._all.discard(slot)
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        return await self._new_slot()
+
+    @asynccontextmanager
+    async def page(self):
+        slot = await self._slots.get()
+        failed = False
+        try:
+            yield slot.page
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            try:
+                slot = await self._release(slot, failed)
+            except Exception:
+                # no fresh context: the dead slot goes back so the pool keeps its
+                # size and later jobs fail fast (retrying the recycle) instead of
+                # waiting forever; the job's own exception, if any, propagates
+                self.failed_releases += 1
+                self._all.add(slot)
+            finally:
+                self._slots.put_nowait(slot)
+
+
+class SyncContextPool(PoolStats):
+    """
+    ContextPool for the sync Playwright API, one page handed out at a time.
+    The context is created on first use; closing the browser closes it.
+    """
+
+    def __init__(self, browser, setup=None, recycle_after=RECYCLE_AFTER,
+                 max_rss_mb=MAX_BROWSER_RSS_MB, **context_kwargs):
+        super().__init__(recycle_after, max_rss_mb)
+        self.browser = browser
+        self.setup = setup
+        self.context_kwargs = context_kwargs
+        self._slot = None
+
+    def _new_slot(self):
+        ctx = self.browser.new_context(**self.context_kwargs)
+        if self.setup:
+            self.setup(ctx)
+        return Slot(ctx, ctx.new_page())
+
+    def __enter__(self):
+        self._slot = self._new_slot()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._slot.context.close()
+        except Exception:
+            pass
+
+    def _release(self, slot, failed):
+        reason = self.recycle_reason(slot, failed)
+        if reason is None:
+            try:
+                for other in slot.context.pages:
+                    if other is not slot.page:
+                        other.close()
+                slot.context.clear_cookies()
+                slot.page.goto(BLANK)
+                return slot
+            except Exception:
+                reason = "crash"
+        self.recycled[reason] += 1
+        try:
+            slot.context.close()
+        except Exception:
+            pass
+        return self._new_slot()
+
+    @contextmanager
+    def page(self):
+        if self._slot is None:
+            self._slot = self._new_slot()
+        failed = False
+        try:
+            yield self._slot.page
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            try:
+                self._slot = self._release(self._slot, failed)
+            except Exception:
+                # keep the dead slot: the next page() fails fast and retries the recycle
+                self.failed_releases += 1
+
+
+class Latency:
+    """Wall time per job, summarized as percentiles."""
+
+    def __init__(self):
+        self.samples = []
+
+    @asynccontextmanager
+    async def timed(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+    def percentile(self, p):
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+    def summary(self):
+        if not self.samples:
+            return "no samples"
+        return " ".join(f"p{p}={self.percentile(p):.1f}s" for p in (50, 90, 99)) + \
+            f" max={max(self.samples):.1f}s over {len(self.samples)}"
+
+
+async def map_pool(pool, items, job, latency=None):
+    """
+    Run `job(page, item)` for every item on pages borrowed from `pool`,
+    all pool slots busy at once. Results come back in input order.
+    """
+    async def run(item):
+        async with pool.page() as page:
+            if latency is None:
+                return await job(page, item)
+            async with latency.timed():
+                return await job(page, item)
+
+    return await asyncio.gather(*(run(item) for item in items))
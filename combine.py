@@ -1,78 +1,95 @@
+import asyncio
+import os
 import re
+import sys
+import unicodedata
+
+from m3u import edit_extinf, iter_entries, parse_file
+from quality import QualityCache, measure_all, quality_rank
+
+MAX_CANDIDATES = 3   # per title; later sources only fill up free slots
 
 def parse_m3u(file_path):
-    """Parse an M3U file and return a list of entries as dicts with title and url."""
-    entries = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if line.startswith('#EXTINF:'):
-            # Extract title after last comma
-            match = re.match(r'#EXTINF:-?\d+(.*),(.*)', line)
-            if match:
-                attributes = match.group(1).strip()
-                title = match.group(2).strip()
-            else:
-                attributes = ""
-                title = "Unknown"
-            i += 1
-            if i < len(lines):
-                url = lines[i].strip()
-            else:
-                url = ""
-            entries.append({'title': title, 'url': url, 'attributes': attributes})
-        i += 1
-    return entries
+    """Stream the #EXTINF entries of an M3U file ('-' reads stdin)."""
+    entries = iter_entries(sys.stdin) if file_path == "-" else parse_file(file_path)
+    for entry in entries:
+        if entry.extinf:
+            yield entry
 
-def stream_speed(url):
-    """Try to determine speed from the URL. Assumes higher bitrate has bigger numbers in URL."""
-    numbers = re.findall(r'\d+', url)
-    if numbers:
-        return max(int(n) for n in numbers)
-    return 0
+def normalize_title(title):
+    """Dedup key: case, accents, punctuation and spacing are ignored."""
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(c for c in title if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[\W_]+", " ", title.casefold()).split()) or "unknown"
 
 def make_extinf(entry, group_title="TCL+"):
     """Generate #EXTINF line with group-title."""
-    attrs = entry['attributes']
-    # If group-title exists, replace it, otherwise add it
-    if 'group-title=' in attrs:
-        attrs = re.sub(r'group-title=".*?"', f'group-title="{group_title}"', attrs)
-    else:
-        attrs = f'{attrs} group-title="{group_title}"'.strip()
-    return f"#EXTINF:-1{(' ' + attrs) if attrs else ''},{entry['title']}"
+    title = None if entry.title else "Unknown"
+    return edit_extinf(entry.extinf, {"group-title": group_title}, title, "-1", entry.attributes_end())
+
+def combine_playlists(input_files, output_file):
+    """
+    Merge any number of playlists. Entries are deduplicated as they stream
+    in, on their normalized title; a title keeps at most MAX_CANDIDATES
+    streams, the earliest ones, and a URL it already has is dropped. Titles
+    with several candidates are then measured (variant BANDWIDTH/RESOLUTION,
+    TTFB, throughput) and the best stream wins; a source listed earlier
+    breaks ties and beats dead streams.
+    """
+    # normalized title -> [(priority, entry), ...]
+    candidates = {}
+    total = 0
+    for priority, file_path in enumerate(input_files):
+        if file_path != "-" and not os.path.exists(file_path):
+            print(f"⚠️ Skipping missing playlist {file_path}")
+            continue
+        for entry in parse_m3u(file_path):
+            total += 1
+            group = candidates.setdefault(normalize_title(entry.title), [])
+            # the same URL from a later source can't rank above the first one
+            if len(group) < MAX_CANDIDATES and all(entry.url != kept.url for _, kept in group):
+                group.append((priority, entry))
+
+    # Only duplicated titles need a measurement
+    targets = {
+        entry.url: entry.request_headers()
+        for group in candidates.values() if len(group) > 1
+        for _, entry in group
+    }
+    cache = QualityCache()
+    measured = asyncio.run(measure_all(targets.items(), cache)) if targets else {}
+    if targets:
+        cache.save()
+        print(f"📏 Measured {cache.misses} streams, {cache.hits} from cache "
+              f"({len(targets)} duplicate candidates)")
+
+    def rank(candidate):
+        priority, entry = candidate
+        dead, pixels, bandwidth, kbps, ttfb = quality_rank(measured.get(entry.url))
+        return (dead, pixels, bandwidth, priority, kbps, ttfb)
+
+    unique = {key: min(group, key=rank)[1] if len(group) > 1 else group[0][1]
+              for key, group in candidates.items()}
 
-def combine_playlists(file1, file2, output_file):
-    entries1 = parse_m3u(file1)
-    entries2 = parse_m3u(file2)
-    
-    combined = entries1 + entries2
-    
-    # Remove duplicates, keeping the fastest stream
-    unique = {}
-    for entry in combined:
-        title = entry['title']
-        speed = stream_speed(entry['url'])
-        if title not in unique:
-            unique[title] = entry
-        else:
-            existing_speed = stream_speed(unique[title]['url'])
-            if speed > existing_speed:
-                unique[title] = entry  # keep faster stream
-    
     # Sort alphabetically by title
-    sorted_entries = sorted(unique.values(), key=lambda x: x['title'].lower())
-    
+    sorted_entries = sorted(
+        unique.values(),
+        key=lambda x: (x.title or "Unknown").lower(),
+    )
+
     # Write to new M3U file
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("#EXTM3U\n")
         for entry in sorted_entries:
             f.write(f"{make_extinf(entry)}\n")
-            f.write(f"{entry['url']}\n")
-    
-    print(f"Combined playlist saved to {output_file} with {len(sorted_entries)} unique entries.")
+            f.write(f"{entry.url}\n")
+
+    print(f"Combined {total} entries from {len(input_files)} playlists into {output_file} "
+          f"with {len(sorted_entries)} unique entries.")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python combine.py input1.m3u [input2.m3u ... | -] output.m3u")
+        sys.exit(1)
 
-# Example usage:
-combine_playlists("vidaa.m3u8", "tcl.m3u8", "combine.m3u8")
+    combine_playlists(sys.argv[1:-1], sys.argv[-1])
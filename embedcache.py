@@ -0,0 +1,86 @@
+import json
+import sqlite3
+import time
+
+from probecache import CACHE_DB
+
+# ---------- CONFIG ----------
+MAX_AGE = 12 * 3600     # stream tokens rarely outlive this, even when still answering
+
+
+class EmbedCache:
+    """
+    Embed/iframe URL -> resolved m3u8, with the request headers it needs and
+    when it was observed, kept in the probe cache database across runs.
+    A cached m3u8 is only trusted after revalidate() checked it over plain
+    HTTP; the browser is left for misses and stale entries.
+    """
+
+    def __init__(self, path=CACHE_DB, max_age=MAX_AGE):
+        self.max_age = max_age
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS embeds (
+                   embed_url TEXT PRIMARY KEY,
+                   m3u8 TEXT NOT NULL,
+                   headers TEXT NOT NULL,
+                   observed_at REAL NOT NULL
+               )"""
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, embed_url):
+        """(m3u8, headers, observed_at) if embed_url resolved recently enough, else None."""
+        row = self.db.execute(
+            "SELECT m3u8, headers, observed_at FROM embeds WHERE embed_url = ? AND observed_at > ?",
+            (embed_url, time.time() - self.max_age),
+        ).fetchone()
+        return (row[0], json.loads(row[1]), row[2]) if row else None
+
+    def put(self, embed_url, m3u8, headers=None):
+        self.db.execute(
+            "INSERT OR REPLACE INTO embeds VALUES (?, ?, ?, ?)",
+            (embed_url, m3u8, json.dumps(headers or {}, sort_keys=True), time.time()),
+        )
+        self.db.commit()
+
+    def forget(self, embed_url):
+        self.db.execute("DELETE FROM embeds WHERE embed_url = ?", (embed_url,))
+        self.db.commit()
+
+    async def revalidate(self, embed_url, check):
+        """
+        Cached m3u8 for embed_url when `await check(m3u8, headers)` still
+        accepts it, else None (a failed entry is dropped).
+        """
+        cached = self.get(embed_url)
+        if cached is None:
+            self.misses += 1
+            return None
+        m3u8, headers, _ = cached
+        if await check(m3u8, headers):
+            self.hits += 1
+            return m3u8
+        self.stale += 1
+        self.forget(embed_url)
+        return None
+
+    def close(self):
+        self.db.execute("DELETE FROM embeds WHERE observed_at < ?", (time.time() - self.max_age,))
+        self.db.commit()
+        self.db.close()
+
+    def summary(self):
+        total = self.hits + self.stale + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        return (f"{self.hits}/{total} embeds served from cache ({rate:.0f}%), "
+                f"{self.stale} stale, {self.misses} misses")
@@ -0,0 +1,155 @@
+import sqlite3
+import sys
+import time
+
+from probecache import CACHE_DB, Probe, headers_key
+
+# ---------- CONFIG ----------
+ALPHA = 0.3                 # EWMA weight of the newest probe
+FAIL_THRESHOLD = 3          # consecutive failures before backing off
+BACKOFF_BASE = 20 * 60      # first backoff, doubled on every further failure
+BACKOFF_MAX = 24 * 3600
+UNKNOWN_UPTIME = 0.5        # prior for a URL never probed
+UNKNOWN_LATENCY = 2.0       # seconds a probe is expected to take without history
+
+
+class HealthHistory:
+    """
+    Probe outcomes per (check, URL, headers) across runs: EWMA uptime and
+    latency, consecutive failures and the backoff they earned. Lives in the
+    probe cache database (pass its connection).
+    """
+
+    def __init__(self, db, check):
+        self.db = db
+        self.check = check
+        self.backed_off = 0
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS health (
+                   check_name TEXT NOT NULL,
+                   url TEXT NOT NULL,
+                   headers TEXT NOT NULL,
+                   uptime REAL NOT NULL,
+                   latency REAL,
+                   fails INTEGER NOT NULL,
+                   probes INTEGER NOT NULL,
+                   last_probe REAL NOT NULL,
+                   next_probe REAL NOT NULL,
+                   PRIMARY KEY (check_name, url, headers)
+               )"""
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.db.commit()
+
+    def _row(self, url, headers):
+        return self.db.execute(
+            "SELECT uptime, latency, fails, probes, next_probe FROM health "
+            "WHERE check_name = ? AND url = ? AND headers = ?",
+            (self.check, url, headers_key(headers)),
+        ).fetchone()
+
+    def priority(self, url, headers=None):
+        """Sort key, likely-alive and fast first."""
+        row = self._row(url, headers)
+        if row is None:
+            return (-UNKNOWN_UPTIME, 0.0)
+        return (-row[0], row[1] if row[1] is not None else 0.0)
+
+    def expected_value(self, url, headers=None):
+        """Sort key for a time budget: chance of a live verdict per expected second."""
+        row = self._row(url, headers)
+        uptime, latency = (row[0], row[1]) if row else (UNKNOWN_UPTIME, None)
+        return -uptime / max(latency or UNKNOWN_LATENCY, 0.05)
+
+    def last_verdict(self, url, headers=None):
+        """Probe with the latest known verdict; a URL never probed is given the benefit of the doubt."""
+        row = self._row(url, headers)
+        return Probe(row is None or row[2] == 0)
+
+    def backing_off(self, url, headers=None):
+        row = self._row(url, headers)
+        if row is not None and row[4] > time.time():
+            self.backed_off += 1
+            return True
+        return False
+
+    def record(self, url, headers, probe):
+        now = time.time()
+        row = self._row(url, headers)
+        uptime, latency, fails, probes = row[:4] if row else (UNKNOWN_UPTIME, None, 0, 0)
+
+        uptime = ALPHA * probe.verdict + (1 - ALPHA) * uptime
+        if probe.ttfb is not None:
+            latency = probe.ttfb if latency is None else ALPHA * probe.ttfb + (1 - ALPHA) * latency
+        fails = 0 if probe.verdict else fails + 1
+        next_probe = 0.0
+        if fails >= FAIL_THRESHOLD:
+            next_probe = now + min(BACKOFF_BASE * 2 ** (fails - FAIL_THRESHOLD), BACKOFF_MAX)
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO health VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.check, url, headers_key(headers), uptime, latency, fails, probes + 1,
+             now, next_probe),
+        )
+
+    def record_cut(self, url, headers, seconds):
+        """
+        A probe the run's time budget stopped after `seconds`: the stream
+        gave no verdict, so uptime, failures and backoff stay as they were;
+        only the latency learns that it took at least that long.
+        """
+        row = self._row(url, headers)
+        if row is None:
+            uptime, latency, fails, probes, next_probe = UNKNOWN_UPTIME, None, 0, 0, 0.0
+        else:
+            uptime, latency, fails, probes, next_probe = row
+        latency = seconds if latency is None else max(latency, ALPHA * seconds + (1 - ALPHA) * latency)
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO health VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.check, url, headers_key(headers), uptime, latency, fails, probes + 1,
+             time.time(), next_probe),
+        )
+
+    def report(self):
+        print(f"🩺 Health history: {self.backed_off} URLs skipped while backing off")
+
+
+# ---------- REPORT COMMAND ----------
+def print_report(path=CACHE_DB, check=None, limit=50):
+    db = sqlite3.connect(path)
+    where, args = ("WHERE check_name = ?", (check,)) if check else ("", ())
+    now = time.time()
+
+    for name, total, up, backing in db.execute(
+        f"SELECT check_name, COUNT(*), AVG(uptime), SUM(next_probe > ?) FROM health {where} "
+        "GROUP BY check_name",
+        (now, *args),
+    ):
+        print(f"[{name}] {total} URLs, mean uptime {up:.0%}, {backing} backing off")
+
+    rows = db.execute(
+        f"SELECT check_name, url, uptime, latency, fails, next_probe FROM health "
+        f"{'WHERE' if not check else where + ' AND'} next_probe > ? "
+        "ORDER BY next_probe DESC LIMIT ?",
+        (*args, now, limit),
+    ).fetchall()
+    if rows:
+        print(f"\n{'check':<10} {'fails':>5} {'uptime':>7} {'latency':>8} {'retry in':>9}  url")
+    for name, url, uptime, latency, fails, next_probe in rows:
+        latency = f"{latency:.2f}s" if latency is not None else "-"
+        retry = f"{(next_probe - now) / 60:.0f}m"
+        print(f"{name:<10} {fails:>5} {uptime:>7.0%} {latency:>8} {retry:>9}  {url}")
+    db.close()
+
+
+if __name__ == "__main__":
+    # python health.py [check] [database]
+    print_report(
+        sys.argv[2] if len(sys.argv) > 2 else CACHE_DB,
+        sys.argv[1] if len(sys.argv) > 1 else None,
+    )
@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import zlib
+from collections import namedtuple
+
+from aiohttp import web
+
+# ---------- CONFIG ----------
+BASE_PORT = 18100
+SEGMENT_BYTES = 400_000     # a bit more than vidaa's 384 KB sample
+SEGMENTS = 5                # per media playlist
+TARGET_DURATION = 6
+CHUNK_BYTES = 16_384        # pacing unit for bandwidth caps
+STALL_SECONDS = 3600        # a stalled request never answers within a probe
+
+# latency: seconds before every response; kbps: KB/s cap per connection;
+# *_rate: share of the host's streams that 404 / stall / serve HTML;
+# blocked: URLs carry a blocked CDN domain
+Profile = namedtuple(
+    "Profile", "latency kbps error_rate stall_rate bad_type_rate blocked",
+    defaults=(0.0, 0.0, 0.0, False),
+)
+
+# one host (port) per profile, in port order
+PROFILES = {
+    "fast": Profile(0.02, 4000),
+    "slow": Profile(0.05, 100),
+    "laggy": Profile(5.0, 2000),
+    "flaky": Profile(0.05, 2000, error_rate=0.3),
+    "stalling": Profile(0.05, 2000, stall_rate=0.2),
+    "mislabeled": Profile(0.02, 2000, bad_type_rate=0.5),
+    "blocked": Profile(0.02, 4000, blocked=True),
+}
+
+TS_PACKET = bytes([0x47]) + bytes(187)
+SEGMENT = TS_PACKET * (SEGMENT_BYTES // len(TS_PACKET))
+
+
+# ---------- GROUND TRUTH ----------
+def host_profile(port, base_port=BASE_PORT):
+    return list(PROFILES.items())[port - base_port]
+
+
+def fate(port, stream, base_port=BASE_PORT):
+    """
+    What a stream does, decided by a hash so every request and every run
+    agree: "error", "stall", "bad_type" or "ok".
+    """
+    _, profile = host_profile(port, base_port)
+    roll = zlib.crc32(f"{port}/{stream}".encode()) / 2 ** 32
+    for name, rate in (("error", profile.error_rate), ("stall", profile.stall_rate),
+                       ("bad_type", profile.bad_type_rate)):
+        if roll < rate:
+            return name
+        roll -= rate
+    return "ok"
+
+
+def stream_url(port, stream, base_port=BASE_PORT, host="127.0.0.1"):
+    _, profile = host_profile(port, base_port)
+    url = f"http://{host}:{port}/live/{stream}/master.m3u8"
+    return url + "?cdn=amagi.tv" if profile.blocked else url
+
+
+def generate_playlist(path, count, base_port=BASE_PORT):
+    """`count` entries spread round-robin over the hosts; returns {url: (profile, fate)}."""
+    truth = {}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("#EXTM3U\n")
+        for i in range(count):
+            port = base_port + i % len(PROFILES)
+            url = stream_url(port, i, base_port)
+            name, _ = host_profile(port, base_port)
+            truth[url] = (name, fate(port, i, base_port))
+            f.write(f'#EXTINF:-1 group-title="{name}",Channel {i}\n{url}\n')
+    return truth
+
+
+# ---------- SERVER ----------
+class Origin:
+    """One aiohttp app per host; shares byte and request counters."""
+
+    def __init__(self, base_port=BASE_PORT):
+        self.base_port = base_port
+        self.stats = {"requests": 0, "bytes": 0}
+
+    def app(self, port):
+        _, profile = host_profile(port, self.base_port)
+        app = web.Application()
+
+        async def handle(request, body, content_type):
+            self.stats["requests"] += 1
+            stream = int(request.match_info["stream"])
+            outcome = fate(port, stream, self.base_port)
+            if outcome == "stall":
+                await asyncio.sleep(STALL_SECONDS)
+            await asyncio.sleep(profile.latency)
+            if outcome == "error":
+                raise web.HTTPNotFound()
+            if outcome == "bad_type":
+                body, content_type = b"<html><body>Stream offline</body></html>", "text/html"
+
+            status, start, end = 200, 0, len(body)
+            range_header = request.headers.get("Range", "")
+            if range_header.startswith("bytes="):
+                first, _, last = range_header[6:].partition("-")
+                start = int(first or 0)
+                end = min(len(body), int(last) + 1) if last else len(body)
+                status = 206
+
+            response = web.StreamResponse(status=status, headers={"Content-Type": content_type})
+            if status == 206:
+                response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(body)}"
+            response.content_length = end - start
+            try:
+                await response.prepare(request)
+                if request.method == "HEAD":
+                    return response
+                for offset in range(start, end, CHUNK_BYTES):
+                    chunk = body[offset:min(offset + CHUNK_BYTES, end)]
+                    await response.write(chunk)
+                    self.stats["bytes"] += len(chunk)
+                    await asyncio.sleep(len(chunk) / 1024 / profile.kbps)
+                await response.write_eof()
+            except ConnectionResetError:
+                pass    # the checker read enough and hung up
+            return response
+
+        async def master(request):
+            body = (
+                "#EXTM3U\n"
+                '#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360\nlo/index.m3u8\n'
+                '#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720\nhi/index.m3u8\n'
+            )
+            return await handle(request, body.encode(), "application/vnd.apple.mpegurl")
+
+        async def media(request):
+            lines = ["#EXTM3U", f"#EXT-X-TARGETDURATION:{TARGET_DURATION}",
+                     "#EXT-X-MEDIA-SEQUENCE:0"]
+            for k in range(SEGMENTS):
+                lines += [f"#EXTINF:{TARGET_DURATION}.0,", f"seg{k}.ts"]
+            body = "\n".join(lines) + "\n"
+            return await handle(request, body.encode(), "application/vnd.apple.mpegurl")
+
+        async def segment(request):
+            return await handle(request, SEGMENT, "video/mp2t")
+
+        async def stats(request):
+            if request.method == "POST":
+                self.stats.update(requests=0, bytes=0)
+            return web.json_response(self.stats)
+
+        app.router.add_route("*", "/live/{stream}/master.m3u8", master)
+        app.router.add_route("*", "/live/{stream}/{variant}/index.m3u8", media)
+        app.router.add_route("*", "/live/{stream}/{variant}/{segment}.ts", segment)
+        app.router.add_route("*", "/_stats", stats)
+        return app
+
+    async def serve(self, host="127.0.0.1"):
+        runners = []
+        for i, name in enumerate(PROFILES):
+            port = self.base_port + i
+            runner = web.AppRunner(self.app(port), access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, host, port).start()
+            runners.append(runner)
+            print(f"🛰️ {name:<11} http://{host}:{port}  {PROFILES[name]}")
+        print("✅ Origin ready", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            for runner in runners:
+                await runner.cleanup()
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic HLS streams with per-host faults.")
+    parser.add_argument("--base-port", type=int, default=BASE_PORT,
+                        help=f"first host port, one per profile (default {BASE_PORT})")
+    parser.add_argument("--playlist", metavar="PATH",
+                        help="also write a playlist of --entries streams to PATH")
+    parser.add_argument("--entries", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.playlist:
+        generate_playlist(args.playlist, args.entries, args.base_port)
+        print(f"📝 Wrote {args.entries} entries to {args.playlist}")
+
+    try:
+        asyncio.run(Origin(args.base_port).serve())
+    except KeyboardInterrupt:
+        pass
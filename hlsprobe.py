@@ -0,0 +1,386 @@
+import asyncio
+import math
+import re
+import time
+from statistics import NormalDist
+from urllib.parse import urljoin
+
+# ---------- CONFIG ----------
+SAMPLE_BYTES = 384_000      # read up to 384 KB of media
+WARMUP_BYTES = 32_000       # ignore the first 32 KB for speed
+RETRIES = 2                 # media samples attempted per probe
+SAMPLE_SEGMENTS = 1         # segments sampled in parallel (window split between them)
+MAX_DEPTH = 3               # master -> master -> ... -> media
+MAX_PLAYLIST_BYTES = 512_000
+BLOCK_BYTES = 16_384        # sequential test: one throughput observation per block
+MIN_BLOCKS = 3              # sequential test: observations before any decision
+
+STREAM_INF_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class Variant:
+    """One #EXT-X-STREAM-INF of a master playlist."""
+
+    __slots__ = ("bandwidth", "resolution", "codecs", "uri")
+
+    def __init__(self, bandwidth, resolution, codecs, uri):
+        self.bandwidth = bandwidth      # bits/s, 0 when missing
+        self.resolution = resolution    # (width, height) or None
+        self.codecs = codecs
+        self.uri = uri
+
+    @property
+    def pixels(self):
+        return self.resolution[0] * self.resolution[1] if self.resolution else 0
+
+    def __repr__(self):
+        return f"Variant({self.bandwidth}, {self.resolution}, {self.codecs!r}, {self.uri!r})"
+
+
+def parse_stream_inf(line, uri):
+    attrs = {k: v.strip('"') for k, v in STREAM_INF_ATTR_RE.findall(line.partition(":")[2])}
+    bandwidth = attrs.get("BANDWIDTH", "")
+    width, _, height = attrs.get("RESOLUTION", "").partition("x")
+    return Variant(
+        int(bandwidth) if bandwidth.isdigit() else 0,
+        (int(width), int(height)) if width.isdigit() and height.isdigit() else None,
+        attrs.get("CODECS", ""),
+        uri,
+    )
+
+
+class HLSResult:
+    """
+    Outcome of one deep probe. `stage` is None on success, otherwise where
+    it failed: "blocked", "connect", "status", "playlist", "segment", "speed".
+    `status`/`content_type`/`ttfb` belong to the first request (status is
+    None when no HTTP response came back at all); `segment_ttfb`/`kbps` to
+    the media sample (mean per connection when several segments are sampled).
+    """
+
+    __slots__ = ("url", "stage", "status", "content_type", "ttfb", "segment_url",
+                 "segment_ttfb", "kbps", "variants", "target_duration", "bytes_read",
+                 "seconds")
+
+    def __init__(self, url):
+        self.url = url
+        self.stage = None
+        self.status = None
+        self.content_type = None
+        self.ttfb = None
+        self.segment_url = None
+        self.segment_ttfb = None
+        self.kbps = None
+        self.variants = []
+        self.target_duration = None
+        self.bytes_read = 0       # body bytes pulled over the whole probe
+        self.seconds = None       # wall time of the whole probe
+
+    @property
+    def ok(self):
+        return self.stage is None
+
+    def fail(self, stage):
+        self.stage = stage
+        return self
+
+    def __repr__(self):
+        return (f"HLSResult({self.url!r}, stage={self.stage}, status={self.status}, "
+                f"ttfb={self.ttfb}, kbps={self.kbps}, variants={len(self.variants)}, "
+                f"target_duration={self.target_duration})")
+
+
+def content_type_of(response):
+    return response.headers.get("Content-Type", "").split(";")[0]
+
+
+async def read_playlist(response, first_line, segments=1):
+    """
+    Stream-parse a playlist. A master is read to the end (every variant is
+    wanted); a media playlist stops once it has `segments` segment URIs.
+    Returns (variants, target_duration, segment_uris, bytes_read).
+    """
+    variants, target_duration, pending, uris = [], None, None, []
+    size = len(first_line)
+    while size < MAX_PLAYLIST_BYTES:
+        raw = await response.content.readline()
+        if not raw:
+            break
+        size += len(raw)
+        line = raw.decode("utf-8", "ignore").strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-STREAM-INF"):
+            pending = line
+        elif line.startswith("#EXT-X-TARGETDURATION:"):
+            value = line.partition(":")[2]
+            target_duration = float(value) if value.replace(".", "", 1).isdigit() else None
+        elif not line.startswith("#"):
+            if pending:
+                variants.append(parse_stream_inf(pending, line))
+                pending = None
+            elif not variants:
+                uris.append(line)
+                if len(uris) >= segments:
+                    break
+    return variants, target_duration, uris, size
+
+
+class HLSProber:
+    """
+    Follows master -> variant -> first media segment over one aiohttp
+    session and measures the segment. Master playlists are memoized per
+    (URL, headers) for the prober's lifetime, so entries sharing a master
+    fetch it once.
+
+    variant: "first" follows the first listed variant, "best" the highest
+    BANDWIDTH. accept(ttfb, kbps) decides whether a sample is good enough;
+    a rejected sample is retried up to `retries` times in total.
+    blocked(url) rejects URLs anywhere along the chain.
+
+    Media is sampled with a Range request covering only the warm-up plus
+    sample window, and the response is closed the moment the window is in.
+    With segments=2 the window is split across the first two segments,
+    fetched in parallel.
+
+    With min_kbps and confidence set, sampling is a sequential test: after
+    the warm-up, every BLOCK_BYTES give one seconds-per-KB observation, and
+    the read stops as soon as the confidence interval of the mean lies
+    entirely on one side of min_kbps. A TTFB that accept() already rejects
+    stops the read at the first byte.
+    """
+
+    def __init__(self, session, variant="first", accept=None, blocked=None,
+                 sample_bytes=SAMPLE_BYTES, warmup_bytes=WARMUP_BYTES,
+                 retries=RETRIES, max_depth=MAX_DEPTH, segments=SAMPLE_SEGMENTS,
+                 min_kbps=None, confidence=None):
+        self.session = session
+        self.variant = variant
+        self.accept = accept
+        self.blocked = blocked
+        self.sample_bytes = sample_bytes
+        self.warmup_bytes = warmup_bytes
+        self.retries = retries
+        self.max_depth = max_depth
+        self.segments = max(1, segments)
+        self.min_kbps = min_kbps
+        self._z = NormalDist().inv_cdf(0.5 + confidence / 2) if confidence else None
+        self._masters = {}
+        self.master_fetches = 0
+        self.master_hits = 0
+
+    async def probe(self, url, headers=None):
+        result = HLSResult(url)
+        start = time.perf_counter()
+        await self._probe(url, headers or {}, result)
+        result.seconds = round(time.perf_counter() - start, 3)
+        return result
+
+    async def _probe(self, url, headers, result):
+        playlist_url = url
+        for depth in range(self.max_depth + 1):
+            if self.blocked and self.blocked(playlist_url):
+                return result.fail("blocked")
+
+            master = await self._master(playlist_url, headers)
+            if master is not None:
+                # another entry already fetched this master
+                self.master_hits += 1
+                status, content_type, ttfb, variants = master
+                if depth == 0:
+                    result.status, result.content_type, result.ttfb = status, content_type, ttfb
+                result.variants = result.variants or variants
+                playlist_url = self._pick(playlist_url, variants)
+                continue
+
+            outcome = await self._fetch_playlist(playlist_url, headers, result, depth)
+            if isinstance(outcome, HLSResult):
+                return outcome
+            variants, segments = outcome
+            if variants:
+                playlist_url = self._pick(playlist_url, variants)
+                continue
+            return await self._sample([urljoin(playlist_url, s) for s in segments], headers, result)
+        return result.fail("playlist")
+
+    def _pick(self, base, variants):
+        chosen = variants[0] if self.variant == "first" else max(variants, key=lambda v: v.bandwidth)
+        return urljoin(base, chosen.uri)
+
+    async def _master(self, url, headers):
+        """Memoized master for url + headers, or None when this call should fetch."""
+        key = (url, tuple(sorted(headers.items())))
+        while True:
+            future = self._masters.get(key)
+            if future is None:
+                self._masters[key] = asyncio.get_running_loop().create_future()
+                return None
+            master = await future
+            if master is not None:
+                return master
+
+    def _settle(self, url, headers, master):
+        key = (url, tuple(sorted(headers.items())))
+        future = self._masters[key]
+        if not future.done():
+            future.set_result(master)
+        if master is not None:
+            self.master_fetches += 1
+        else:
+            # not a master: let the next caller fetch it itself
+            del self._masters[key]
+
+    async def _fetch_playlist(self, url, headers, result, depth):
+        """
+        GET a URL that may be a playlist. Returns (variants, segment_uris),
+        or a finished HLSResult when it failed or was sampled as media.
+        """
+        master = None
+        start = time.perf_counter()
+        try:
+            async with self.session.get(url, headers=headers) as r:
+                if depth == 0:
+                    result.status, result.content_type = r.status, content_type_of(r)
+                if r.status >= 400:
+                    return result.fail("status" if depth == 0 else "playlist")
+
+                try:
+                    head = await r.content.readexactly(7)
+                except asyncio.IncompleteReadError as e:
+                    head = e.partial
+                first_byte = time.perf_counter()
+                if depth == 0:
+                    result.ttfb = round(first_byte - start, 3)
+
+                if head != b"#EXTM3U":
+                    if ".m3u8" in url or depth:
+                        return result.fail("playlist")
+                    # progressive stream / raw TS: measure this very response
+                    sample = await self._measure(
+                        r, start, self.warmup_bytes + self.sample_bytes, len(head), first_byte
+                    )
+                    result.bytes_read += sample[2]
+                    if self._settle_sample(result, [sample]) or self.retries <= 1:
+                        return result
+                    return await self._sample([url], headers, result, self.retries - 1)
+
+                first = head + await r.content.readline()
+                variants, target, segments, size = await read_playlist(r, first, self.segments)
+                result.bytes_read += size
+                if variants:
+                    master = (r.status, content_type_of(r), result.ttfb, variants)
+                    result.variants = result.variants or variants
+                elif not segments:
+                    return result.fail("playlist")
+                else:
+                    result.target_duration = target
+                return variants, segments
+        except Exception:
+            if result.status is None and depth == 0:
+                return result.fail("connect")
+            return result.fail("playlist")
+        finally:
+            self._settle(url, headers, master)
+
+    async def _sample(self, urls, headers, result, attempts=None):
+        """Range-sample media URL(s) and measure them, retrying rejected samples."""
+        result.segment_url = urls[0]
+        if self.blocked and any(self.blocked(u) for u in urls):
+            return result.fail("blocked")
+        window = self.warmup_bytes + self.sample_bytes // len(urls)
+        for attempt in range(attempts or self.retries):
+            samples = await asyncio.gather(*(self._range_get(u, headers, window) for u in urls))
+            result.bytes_read += sum(s[2] for s in samples if s)
+            if None in samples:
+                return result.fail("segment")
+            if self._settle_sample(result, samples):
+                return result
+            await asyncio.sleep(0.2)
+        return result
+
+    async def _range_get(self, url, headers, window):
+        """One Range GET for bytes 0..window-1. None when the request failed."""
+        start = time.perf_counter()
+        try:
+            async with self.session.get(
+                url, headers={**headers, "Range": f"bytes=0-{window - 1}"}
+            ) as r:
+                if r.status >= 400:
+                    return None
+                return await self._measure(r, start, window)
+        except Exception:
+            return None
+
+    def _settle_sample(self, result, samples):
+        """Fold (ttfb, kbps, bytes) samples into result; True when accepted."""
+        result.stage = None
+        if any(kbps is None for _, kbps, _ in samples):
+            result.fail("speed")
+            return False
+        result.segment_ttfb = max(ttfb for ttfb, _, _ in samples)
+        result.kbps = round(sum(kbps for _, kbps, _ in samples) / len(samples), 1)
+        if self.accept and not self.accept(result.segment_ttfb, result.kbps):
+            result.fail("speed")
+            return False
+        return True
+
+    async def _measure(self, response, start, window, already=0, first_byte=None):
+        """
+        Read up to `window` bytes and time the part after the warm-up, then
+        close the response so a server ignoring Range stops sending.
+        Returns (ttfb, kbps, bytes_read); kbps is None when the body was
+        shorter than the warm-up.
+        """
+        speed_start = None
+        total = already
+        measured = 0
+        now = first_byte
+        sequential = self._z is not None and self.min_kbps
+        blocks, mean, m2, block_bytes = 0, 0.0, 0.0, 0
+        too_slow_to_start = False
+        try:
+            async for chunk in response.content.iter_chunked(8192):
+                now = time.perf_counter()
+                if first_byte is None:
+                    first_byte = now
+                    if sequential and self.accept and not self.accept(first_byte - start, math.inf):
+                        too_slow_to_start = True
+                        break
+                total += len(chunk)
+                if total < self.warmup_bytes:
+                    continue
+                if speed_start is None:
+                    speed_start = block_start = now
+                measured += len(chunk)
+                if total >= window:
+                    break
+                if not sequential:
+                    continue
+                block_bytes += len(chunk)
+                if block_bytes < BLOCK_BYTES:
+                    continue
+                # Welford update on seconds per KB
+                observed = (now - block_start) / (block_bytes / 1024)
+                blocks += 1
+                delta = observed - mean
+                mean += delta / blocks
+                m2 += delta * (observed - mean)
+                block_bytes, block_start = 0, now
+                if blocks >= MIN_BLOCKS and self._decided(blocks, mean, m2):
+                    break
+        finally:
+            if not response.content.at_eof():
+                response.close()
+
+        if speed_start is None:
+            if too_slow_to_start:
+                return round(first_byte - start, 3), 0.0, total
+            return (None, None, total)
+        ttfb = round(first_byte - start, 3)
+        return ttfb, round((measured / 1024) / max(now - speed_start, 0.001), 1), total
+
+    def _decided(self, blocks, mean, m2):
+        """True once the seconds-per-KB interval excludes the min_kbps threshold."""
+        half = self._z * math.sqrt(m2 / (blocks - 1) / blocks)
+        limit = 1 / self.min_kbps
+        return mean + half < limit or mean - half > limit
@@ -0,0 +1,88 @@
+import time
+from urllib.parse import urlsplit
+
+# ---------- CONFIG ----------
+TRIP_AFTER = 5          # consecutive timeouts / connection errors
+SAMPLE_EVERY = 50       # an open host still gets 1 probe out of this many
+OPEN_TTL = 6 * 3600     # a host tripped in an earlier run is trusted dead this long
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+class HostBreaker:
+    """
+    Per-host circuit breaker for stream probes.
+
+    A host trips after TRIP_AFTER consecutive connection-level failures.
+    While tripped, allow() lets only one probe out of SAMPLE_EVERY through
+    and the rest fail fast; a successful sample closes the breaker again.
+    Tripped hosts are saved in the probe cache database (pass its
+    connection), so the next run starts with one quick check instead of
+    thousands of timeouts.
+    """
+
+    def __init__(self, db, trip_after=TRIP_AFTER, sample_every=SAMPLE_EVERY):
+        self.trip_after = trip_after
+        self.sample_every = sample_every
+        self.failures = {}      # host -> consecutive failures
+        self.opened = {}        # host -> tripped at (epoch)
+        self.seen_open = {}     # host -> requests seen while open
+        self.skipped = 0
+        self.db = db
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, opened_at REAL NOT NULL)"
+        )
+        for host, opened_at in self.db.execute(
+            "SELECT host, opened_at FROM hosts WHERE opened_at > ?", (time.time() - OPEN_TTL,)
+        ):
+            self.opened[host] = opened_at
+            self.seen_open[host] = 0   # first request is the quick check
+        self.restored = len(self.opened)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def allow(self, url):
+        """False when the probe should fail fast because its host is tripped."""
+        host = host_of(url)
+        if host not in self.opened:
+            return True
+        seen = self.seen_open[host]
+        self.seen_open[host] = seen + 1
+        if seen % self.sample_every == 0:
+            return True
+        self.skipped += 1
+        return False
+
+    def success(self, url):
+        host = host_of(url)
+        self.failures.pop(host, None)
+        if self.opened.pop(host, None) is not None:
+            del self.seen_open[host]
+            print(f"🔌 Host recovered: {host}")
+
+    def failure(self, url):
+        """Record a timeout or connection error (not an HTTP error status)."""
+        host = host_of(url)
+        if host in self.opened:
+            self.opened[host] = time.time()
+            return
+        self.failures[host] = self.failures.get(host, 0) + 1
+        if self.failures[host] >= self.trip_after:
+            self.opened[host] = time.time()
+            self.seen_open[host] = 1
+            print(f"🔌 Host tripped after {self.failures[host]} failures: {host}")
+
+    def close(self):
+        self.db.execute("DELETE FROM hosts")
+        self.db.executemany("INSERT INTO hosts VALUES (?, ?)", self.opened.items())
+        self.db.commit()
+
+    def report(self):
+        print(f"🔌 Host breaker: {len(self.opened)} hosts open "
+              f"({self.restored} restored from last run), {self.skipped} probes skipped")
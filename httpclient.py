@@ -0,0 +1,184 @@
+import socket
+import threading
+import time
+
+import requests
+from requests import RequestException  # noqa: F401  re-exported for callers
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+# ---------- CONFIG ----------
+TIMEOUT = (5, 15)           # sync (connect, read) seconds
+ASYNC_TIMEOUT_TOTAL = 30    # async total seconds per request
+POOL_HOSTS = 32             # distinct hosts kept in the sync pool
+PER_HOST_LIMIT = 8          # open connections per host
+ASYNC_LIMIT = 100           # open connections per async session
+DNS_TTL = 300               # seconds
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+try:  # br is only advertised when a decoder is installed
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+
+# ---------- DNS CACHE (sync) ----------
+# Scoped to PooledSession's connections: socket.getaddrinfo itself is left
+# alone, so aiohttp, Playwright and other libraries resolve as usual.
+_dns_cache = {}
+_dns_lock = threading.Lock()
+
+
+def resolve(host, port):
+    """Addresses for host:port, cached for DNS_TTL seconds (requests has no resolver cache)."""
+    key = (host, port)
+    now = time.monotonic()
+    with _dns_lock:
+        hit = _dns_cache.get(key)
+        if hit and now - hit[0] < DNS_TTL:
+            return hit[1]
+    try:
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    except OSError:
+        return [host]   # let the connection raise its usual resolution error
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    with _dns_lock:
+        _dns_cache[key] = (now, addresses)
+    return addresses
+
+
+class _CachedDNSMixin:
+    """Connect to the cached addresses; TLS and Host still use the real host name."""
+
+    def _new_conn(self):
+        host = self._dns_host
+        addresses = resolve(host, self.port)
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    continue
+            self._dns_host = addresses[-1]
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+
+class _CachedDNSHTTPConnection(_CachedDNSMixin, HTTPConnection):
+    pass
+
+
+class _CachedDNSHTTPSConnection(_CachedDNSMixin, HTTPSConnection):
+    pass
+
+
+class _CachedDNSHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CachedDNSHTTPConnection
+
+
+class _CachedDNSHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedDNSHTTPSConnection
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """HTTPAdapter whose direct connections resolve host names through resolve()."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CachedDNSHTTPPool,
+            "https": _CachedDNSHTTPSPool,
+        }
+
+
+# ---------- SYNC ----------
+class PooledSession(requests.Session):
+    """
+    requests.Session with keep-alive pools per host, cached DNS and a default
+    timeout. Scrapers that set their own headers build their own instance
+    instead of changing the shared session().
+    """
+
+    def __init__(self, per_host=PER_HOST_LIMIT, timeout=TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        adapter = CachedDNSAdapter(pool_connections=POOL_HOSTS, pool_maxsize=per_host, pool_block=True)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self.headers.update(DEFAULT_HEADERS)
+        self.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+_session = None
+
+
+def session():
+    """The process-wide sync session, created on first use."""
+    global _session
+    if _session is None:
+        _session = PooledSession()
+    return _session
+
+
+def get(url, **kwargs):
+    return session().get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    return session().head(url, **kwargs)
+
+
+# ---------- ASYNC ----------
+def async_session(limit=ASYNC_LIMIT, per_host=PER_HOST_LIMIT, timeout=None, ssl=True,
+                  headers=None, **kwargs):
+    """
+    A pooled aiohttp.ClientSession: keep-alive, `limit` sockets in total and
+    `per_host` per host, DNS answers cached for DNS_TTL seconds, gzip/br
+    decoded transparently. Use it as `async with async_session() as s:`.
+    """
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=per_host,
+        ttl_dns_cache=DNS_TTL,
+        ssl=ssl,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout or aiohttp.ClientTimeout(total=ASYNC_TIMEOUT_TOTAL),
+        headers={**DEFAULT_HEADERS, "Accept-Encoding": ACCEPT_ENCODING, **(headers or {})},
+        **kwargs,
+    )
+
+
+_async_session = None
+
+
+def shared_async_session():
+    """One async session shared by a whole run; close it with close_async_session()."""
+    global _async_session
+    if _async_session is None or _async_session.closed:
+        _async_session = async_session()
+    return _async_session
+
+
+async def close_async_session():
+    global _async_session
+    if _async_session is not None and not _async_session.closed:
+        await _async_session.close()
+    _async_session = None
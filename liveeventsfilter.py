@@ -1,8 +1,13 @@
-import requests
+import argparse
+import asyncio
 import sys
 from pathlib import Path
 
-TIMEOUT = 10
+from m3u import parse_file, write_playlist
+from streamfilter import duration, head_then_get, probe_entries
+
+CONCURRENCY = 20
+CHECK = "playable"
 VALID_CONTENT_TYPES = [
     "application/vnd.apple.mpegurl",
     "application/x-mpegURL",
@@ -12,85 +17,41 @@ VALID_CONTENT_TYPES = [
     "video/x-flv",
 ]
 
-def is_stream_playable(url: str, headers=None) -> bool:
-    headers = headers or {}
-    try:
-        response = requests.head(url, headers=headers, timeout=TIMEOUT, allow_redirects=True)
-        if response.status_code < 400:
-            content_type = response.headers.get("Content-Type", "").split(";")[0]
-            if content_type in VALID_CONTENT_TYPES:
-                return True
-    except requests.RequestException:
-        pass
-
-    try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT, stream=True)
-        if response.status_code < 400:
-            content_type = response.headers.get("Content-Type", "").split(";")[0]
-            return content_type in VALID_CONTENT_TYPES
-    except requests.RequestException:
-        return False
-
-    return False
-
-def filter_m3u_playlist(input_path: str, output_path: str):
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = [line.rstrip() for line in f]
-
-    output_lines = ["#EXTM3U"]
-    buffer_tags = []
-    buffer_vlcopt = []
-
-    for line in lines:
-        if line.startswith("#EXTINF"):
-            buffer_tags.append(line)
-        elif line.startswith("#EXTVLCOPT"):
-            buffer_vlcopt.append(line)
-        elif line.strip():
-            url = line.strip()
-            # Convert VLC options to HTTP headers
-            headers = {}
-            for opt in buffer_vlcopt:
-                if opt.startswith("#EXTVLCOPT:"):
-                    key_value = opt[len("#EXTVLCOPT:"):].split("=", 1)
-                    if len(key_value) == 2:
-                        key, value = key_value
-                        key = key.lower()
-                        if key == "http-referrer":
-                            headers["Referer"] = value
-                        elif key == "http-origin":
-                            headers["Origin"] = value
-                        elif key == "http-user-agent":
-                            headers["User-Agent"] = value
-
-            print(f"Checking: {url}")
-            if is_stream_playable(url, headers=headers):
-                print("  ✓ Playable")
-                output_lines.extend(buffer_tags)
-                output_lines.extend(buffer_vlcopt)
-                output_lines.append(url)
-            else:
-                print("  ✗ Not playable")
-
-            buffer_tags = []
-            buffer_vlcopt = []
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(output_lines) + "\n")
+async def is_stream_playable(session, url: str, headers=None):
+    return await head_then_get(
+        session, url, lambda status, content_type: status < 400 and content_type in VALID_CONTENT_TYPES,
+        headers,
+    )
+
+async def filter_m3u_playlist(input_path: str, output_path: str, deadline: float = None):
+    # probes finish in priority order; the playlist keeps the input order
+    kept = {}
+    async for i, entry, result in probe_entries(
+        parse_file(input_path), CHECK, is_stream_playable, CONCURRENCY, deadline, headers=True
+    ):
+        print(f"Checking: {entry.url}")
+        if result.verdict:
+            print("  ✓ Playable")
+            entry.headers = tuple(entry.vlcopts())
+            kept[i] = entry
+        else:
+            print("  ✗ Not playable")
+
+    write_playlist(output_path, (kept[i] for i in sorted(kept)))
 
     print(f"\nSaved filtered playlist to: {output_path}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python filter_m3u_playlist.py input.m3u output.m3u")
-        sys.exit(1)
-
-    input_m3u = sys.argv[1]
-    output_m3u = sys.argv[2]
-
-    if not Path(input_m3u).exists():
+    parser = argparse.ArgumentParser(description="Keep only the playable streams of a playlist.")
+    parser.add_argument("input", help="input .m3u/.m3u8")
+    parser.add_argument("output", help="filtered playlist to write")
+    parser.add_argument("--deadline", type=duration,
+                        help="time budget for the whole run, e.g. 480s or 8m")
+    args = parser.parse_args()
+
+    if not Path(args.input).exists():
         print("Input file does not exist.")
         sys.exit(1)
 
-    filter_m3u_playlist(input_m3u, output_m3u)
+    asyncio.run(filter_m3u_playlist(args.input, args.output, args.deadline))
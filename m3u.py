@@ -0,0 +1,371 @@
+import heapq
+import itertools
+import os
+import re
+import tempfile
+
+# #EXTINF:<duration> <attributes>,<title> -- the title starts at the first
+# comma that is not inside a quoted attribute value.
+EXTINF_RE = re.compile(r'#EXTINF:\s*(-?[\d.]+)?((?:[^,"]|"[^"]*")*),(.*)')
+EXTINF_HEAD_RE = re.compile(r'#EXTINF:\s*(-?[\d.]+)?(.*)')
+ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+
+# VLC option name -> HTTP request header
+VLC_HEADER_OPTS = {
+    "http-referrer": "Referer",
+    "http-origin": "Origin",
+    "http-user-agent": "User-Agent",
+}
+
+
+def split_extinf(line):
+    """Split an #EXTINF line into (duration, attributes, title)."""
+    match = EXTINF_RE.match(line)
+    if not match:
+        # unbalanced quotes: fall back to the last comma
+        head, _, title = line.rpartition(",") if "," in line else (line, "", "")
+        match = EXTINF_HEAD_RE.match(head)
+        return match.group(1) or "", match.group(2).strip(), title.strip()
+    return match.group(1) or "", match.group(2).strip(), match.group(3).strip()
+
+
+def title_comma(line):
+    """
+    Index of the comma that starts the title: the first one with an even
+    number of quotes before it, i.e. outside the quoted attribute values.
+    -1 when there is none or a quote is unbalanced.
+    """
+    comma = line.find(",")
+    quotes = line.count('"', 0, comma)
+    while comma >= 0 and quotes % 2:
+        following = line.find(",", comma + 1)
+        if following < 0:
+            return -1
+        quotes += line.count('"', comma, following)
+        comma = following
+    return comma
+
+
+def attributes_end(line):
+    """
+    Where the attributes of an #EXTINF line end: the title comma, the last
+    comma when a quote is unbalanced (like split_extinf), len(line) when
+    there is no comma at all. Attribute lookups never look past it.
+    """
+    comma = line.find(",")
+    if comma < 0 or line.count('"', 0, comma) % 2:
+        # a comma inside a quoted value comes first, or there is none
+        comma = title_comma(line)
+        if comma < 0:
+            comma = line.rfind(",")
+    return comma if comma >= 0 else len(line)
+
+
+def extinf_duration(line):
+    return line[len("#EXTINF:"):].lstrip().split(",", 1)[0].split(" ", 1)[0]
+
+
+def parse_attributes(attributes):
+    """Tokenize 'tvg-id="x" group-title="y"' into an ordered dict."""
+    return dict(ATTR_RE.findall(attributes))
+
+
+def format_extinf(duration, attrs, title):
+    """Serialize an #EXTINF line from its parsed parts."""
+    attributes = " ".join([f'{key}="{value}"' for key, value in attrs.items()])
+    return f"#EXTINF:{duration or '-1'}{(' ' + attributes) if attributes else ''},{title}"
+
+
+_ATTR_RES = {}
+
+
+def attribute_re(key):
+    """Compiled ' key="value"' pattern, one per attribute name."""
+    regex = _ATTR_RES.get(key)
+    if regex is None:
+        regex = _ATTR_RES[key] = re.compile(f' {re.escape(key)}="([^"]*)"')
+    return regex
+
+
+def _rebuild_extinf(line, attrs, title, duration):
+    old_duration, attributes, old_title = split_extinf(line)
+    return format_extinf(
+        old_duration if duration is None else duration,
+        dict(parse_attributes(attributes), **attrs),
+        old_title if title is None else title,
+    )
+
+
+def edit_extinf(line, attrs, title=None, duration=None, end=None):
+    """
+    Set attributes (and the title or duration when given) on an #EXTINF
+    line. Only the changed values are replaced in the line's text, new
+    attributes go after the existing ones. `end` is attributes_end(line)
+    when the caller already knows it.
+    """
+    if end is None:
+        end = attributes_end(line)
+    for key, value in attrs.items():
+        match = attribute_re(key).search(line, 0, end)
+        if match:
+            start, stop = match.span(1)
+            line = f"{line[:start]}{value}{line[stop:]}"
+            end += len(value) - (stop - start)
+        elif end == len(line):
+            return _rebuild_extinf(line, attrs, title, duration)
+        else:
+            head = line[:end].rstrip()
+            line = f'{head} {key}="{value}"{line[end:]}'
+            end = len(head) + len(key) + len(value) + 4
+    if title is not None:
+        if end == len(line):
+            return _rebuild_extinf(line, attrs, title, duration)
+        line = line[:end + 1] + title
+    if duration is not None and not line.startswith((f"#EXTINF:{duration} ", f"#EXTINF:{duration},")):
+        old = extinf_duration(line)
+        line = "#EXTINF:" + duration + line[line.find(old, 8) + len(old):]
+    return line
+
+
+class Entry:
+    """
+    One playlist entry: #EXTINF line, its tag lines and the URL. The first
+    `lead` tags stood before the #EXTINF line and are written back there.
+    """
+
+    __slots__ = ("_extinf", "_attrs", "_end", "_title", "_headers", "lead", "url")
+
+    def __init__(self, extinf, headers, url, lead=0):
+        self._headers = headers
+        self.lead = lead
+        self.url = url
+        self.extinf = extinf
+
+    @property
+    def headers(self):
+        return self._headers
+
+    @headers.setter
+    def headers(self, tags):
+        # replaced tags all go after #EXTINF
+        self._headers = tags
+        self.lead = 0
+
+    @property
+    def extinf(self):
+        return self._extinf
+
+    @extinf.setter
+    def extinf(self, line):
+        self._extinf = line
+        self._attrs = {}
+        self._end = None
+        self._title = None if line else ""
+
+    def attributes_end(self):
+        """attributes_end() of the #EXTINF line, computed once."""
+        end = self._end
+        if end is None:
+            end = self._end = attributes_end(self._extinf)
+        return end
+
+    @property
+    def title(self):
+        title = self._title
+        if title is None:
+            end = self._end
+            if end is None:
+                end = self.attributes_end()
+            title = self._title = self._extinf[end + 1:].strip()
+        return title
+
+    def get(self, key, default=""):
+        """
+        Look up one attribute with a plain substring search in the text
+        before the title; found values are remembered.
+        """
+        attrs = self._attrs
+        if key in attrs:
+            return attrs[key]
+        line = self._extinf
+        end = self._end
+        if end is None:
+            end = self.attributes_end()
+        start = line.find(f' {key}="', 0, end)
+        if start < 0:
+            return default
+        start += len(key) + 3
+        stop = line.find('"', start, end)
+        if stop < 0:
+            return default
+        attrs[key] = value = line[start:stop]
+        return value
+
+    def rewrite(self, title=None, **attrs):
+        """
+        Update the title and/or attributes, editing only the changed values
+        in the #EXTINF text; the rest of the line stays as it was. Attribute
+        names use underscores for dashes: rewrite(group_title="Fast").
+        """
+        line = self._extinf
+        if not line:
+            attrs = {key.replace("_", "-"): value for key, value in attrs.items()}
+            self.extinf = format_extinf("", attrs, title or "")
+            return
+        if attrs:
+            attrs = {key.replace("_", "-"): value for key, value in attrs.items()}
+            self._attrs.update(attrs)
+        self._extinf = edit_extinf(line, attrs, title, end=self.attributes_end())
+        self._end = None
+        if title is not None:
+            self._title = title
+
+    def vlcopts(self):
+        return [h for h in self.headers if h.startswith("#EXTVLCOPT")]
+
+    def kodiprops(self):
+        return [h for h in self.headers if h.startswith("#KODIPROP")]
+
+    def request_headers(self):
+        """Convert #EXTVLCOPT http-* options into HTTP request headers."""
+        headers = {}
+        for opt in self.headers:
+            if not opt.startswith("#EXTVLCOPT:"):
+                continue
+            key, sep, value = opt[len("#EXTVLCOPT:"):].partition("=")
+            name = VLC_HEADER_OPTS.get(key.strip().lower())
+            if sep and name:
+                headers[name] = value
+        return headers
+
+    def lines(self):
+        yield from self.headers[:self.lead]
+        if self.extinf:
+            yield self.extinf
+        yield from self.headers[self.lead:]
+        yield self.url
+
+
+def iter_entries(lines):
+    """
+    Yield an Entry for every URL line in an iterable of playlist lines.
+    Tag lines between two URLs (other than #EXTINF and #EXTM3U) are kept
+    as the entry's headers, in their original order and on their side of
+    the #EXTINF line. An #EXTINF without a URL is dropped together with
+    its tags. The #EXTM3U header is read with read_header.
+    """
+    extinf = ""
+    headers = []
+    lead = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#EXTM3U"):
+            continue
+        if line.startswith("#EXTINF"):
+            if extinf:
+                # previous #EXTINF never got a URL; drop its tags with it
+                headers = []
+            extinf = line
+            lead = len(headers)
+        elif line.startswith("#"):
+            headers.append(line)
+        else:
+            yield Entry(extinf, tuple(headers), line, lead)
+            extinf = ""
+            headers = []
+            lead = 0
+
+
+def parse_file(path):
+    """Stream entries from a playlist file without loading it into memory."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        yield from iter_entries(f)
+
+
+def read_header(path, default="#EXTM3U"):
+    """The playlist's #EXTM3U line with its attributes (url-tvg, ...), or `default`."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                return line if line.startswith("#EXTM3U") else default
+    return default
+
+
+def write_playlist(path, entries, header="#EXTM3U"):
+    """Write entries to path and return how many were written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for entry in entries:
+            for line in entry.lines():
+                f.write(line + "\n")
+            count += 1
+    return count
+
+
+# ---------- INCREMENTAL SORTED OUTPUT ----------
+RUN_SIZE = 5_000  # entries per sorted run held in memory
+
+
+def title_key(entry):
+    return entry.title.lower()
+
+
+class SortedPlaylistWriter:
+    """
+    Append entries to `<output>.partial` as they arrive (flushed, so a
+    killed run still leaves a valid playlist on disk), then on close sort
+    them into `output` with an external merge sort over sorted runs of at
+    most `run_size` entries.
+
+        with SortedPlaylistWriter("out.m3u8") as out:
+            out.add(entry)
+    """
+
+    def __init__(self, output_path, key=title_key, run_size=RUN_SIZE, header="#EXTM3U"):
+        self.output_path = str(output_path)
+        self.partial_path = self.output_path + ".partial"
+        self.key = key
+        self.run_size = run_size
+        self.header = header
+        self.count = 0
+        self._partial = None
+
+    def __enter__(self):
+        self._partial = open(self.partial_path, "w", encoding="utf-8")
+        self._partial.write(self.header + "\n")
+        self._partial.flush()
+        return self
+
+    def add(self, entry):
+        self._partial.write("".join(line + "\n" for line in entry.lines()))
+        self._partial.flush()
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._partial.close()
+        if exc_type is None:
+            self._sort()
+            os.remove(self.partial_path)
+        return False
+
+    def _sort(self):
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(self.output_path))) as tmp:
+            runs = []
+            entries = parse_file(self.partial_path)
+            while True:
+                run = sorted(itertools.islice(entries, self.run_size), key=self.key)
+                if not run:
+                    break
+                path = os.path.join(tmp, f"run{len(runs)}.m3u")
+                write_playlist(path, run)
+                runs.append(path)
+
+            sorted_path = os.path.join(tmp, "sorted.m3u")
+            write_playlist(
+                sorted_path,
+                heapq.merge(*(parse_file(path) for path in runs), key=self.key),
+                header=self.header,
+            )
+            os.replace(sorted_path, self.output_path)
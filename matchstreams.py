@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import re
+
+from playwright.async_api import async_playwright
+
+from browserpool import ContextPool, Latency, map_pool
+from mediasniff import sniff_sync
+from resourceblock import ResourceBlocker
+from streamcapture import StreamCapture
+from tieredresolver import BROWSER, UNRESOLVED, TieredResolver
+
+log = logging.getLogger("scraper")
+
+# ---------- CONFIG ----------
+WORKERS = 4             # matches processed in parallel, one browser context each
+CAPTURE_TIMEOUT = 3     # ceiling for the playlist request once the player was started
+CLICK_SETTLE = 1        # after a click, how long a playlist may take before clicking on
+AD_TAB_TIMEOUT = 3      # how long the first click may take to open its ad tab
+REVALIDATE_TIMEOUT = 6  # plain GET that confirms a cached m3u8 still answers
+IGNORED = ("prd.jwpltx.com",)
+
+
+def strip_non_ascii(text: str) -> str:
+    """Remove emojis and non-ASCII characters."""
+    if not text:
+        return ""
+    return re.sub(r"[^\x00-\x7F]+", "", text)
+
+
+async def still_playing(m3u8, headers):
+    probe = await asyncio.to_thread(sniff_sync, m3u8, headers, REVALIDATE_TIMEOUT)
+    return probe.verdict
+
+
+async def start_player(page, capture):
+    """Click play, then the ad-then-play sequence; stops as soon as a playlist shows up."""
+    selectors = [
+        "div.jw-icon-display[role='button']",
+        ".jw-icon-playback",
+        ".vjs-big-play-button",
+        ".plyr__control",
+        "div[class*='play']",
+        "div[role='button']",
+        "button",
+        "canvas"
+    ]
+    for sel in selectors:
+        try:
+            el = await page.query_selector(sel)
+            if el:
+                await el.click(timeout=300)
+                break
+        except:
+            continue
+    if await capture.wait(CLICK_SETTLE):
+        return
+
+    try:
+        await page.mouse.click(200, 200)
+        log.info("  👆 First click triggered ad")
+        try:
+            new_tab = await page.context.wait_for_event("page", timeout=AD_TAB_TIMEOUT * 1000)
+        except Exception:
+            new_tab = None
+        if new_tab:
+            try:
+                url = (new_tab.url or "").lower()
+                log.info(f"  🚫 Forcing close on ad tab: {url if url else '(blank/new)'}")
+                await new_tab.close()
+            except Exception:
+                log.info("  ⚠️ Ad tab close failed")
+        if await capture.wait(CLICK_SETTLE):
+            return
+        await page.mouse.click(200, 200)
+        log.info("  ▶️ Second click started player")
+    except Exception as e:
+        log.warning(f"⚠️ Momentum click sequence failed: {e}")
+
+
+class MatchStreams:
+    """
+    One m3u8 per match for the streamed.su style scrapers, cheapest way first:
+
+      cache    an m3u8 resolved on an earlier run that still answers
+      static   plain HTTP on the embed pages and their iframes (TieredResolver)
+      browser  a pooled Playwright context plays the embeds, for what is left
+
+    `headers` go with every request. Each cached m3u8 is stored with the
+    headers it was fetched with: the captured request's for the browser tier.
+    Counts the streams found and the embeds the browser failed on.
+    """
+
+    def __init__(self, headers, cache, workers=WORKERS):
+        self.headers = headers
+        self.cache = cache
+        self.workers = workers
+        self.resolver = TieredResolver(headers)
+        self.streams = 0
+        self.failures = 0
+
+    async def playable(self, m3u8):
+        return await still_playing(m3u8, self.headers)
+
+    async def cached_stream(self, embed_urls):
+        """First embed whose cached m3u8 still answers over plain HTTP, or None."""
+        for embed in embed_urls:
+            m3u8 = await self.cache.revalidate(embed, still_playing)
+            if m3u8:
+                return m3u8
+        return None
+
+    async def static_stream(self, embed_urls):
+        """First embed whose m3u8 shows up over plain HTTP (page or nested iframes), or None."""
+        for embed in embed_urls:
+            m3u8 = await self.resolver.resolve_static(embed, self.playable)
+            if m3u8:
+                self.cache.put(embed, m3u8, self.headers)
+                return m3u8
+        return None
+
+    async def extract_m3u8(self, page, embed_url):
+        """(m3u8, headers it was requested with), or (None, None)."""
+        # pages are reused across matches: the capture detaches when this embed is done
+        with StreamCapture(page, ignore=IGNORED) as capture:
+            try:
+                await page.goto(embed_url, wait_until="domcontentloaded", timeout=5000)
+                await page.bring_to_front()
+                if not capture.urls:
+                    await start_player(page, capture)
+
+                urls = await capture.wait(CAPTURE_TIMEOUT)
+                if urls:
+                    log.info(f"  ⚡ Stream: {urls[0]}")
+                    return urls[0], {**self.headers, **capture.headers.get(urls[0], {})}
+
+                html = await page.content()
+                matches = re.findall(r'https?://[^\s\"\'<>]+\.m3u8(?:\?[^\"\'<>]*)?', html)
+                if matches:
+                    log.info(f"  🕵️ Fallback: {matches[0]}")
+                    return matches[0], self.headers
+                return None, None
+            except Exception as e:
+                self.failures += 1
+                log.warning(f"⚠️ {embed_url} failed: {e}")
+                return None, None
+
+    async def process_match(self, index, match, embed_urls, total, page):
+        title = strip_non_ascii(match.get("title", "Unknown Match"))
+        log.info(f"\n🎯 [{index}/{total}] {title}")
+        if embed_urls:
+            log.info(f"  ↳ {len(embed_urls)} embed URLs")
+        for i, embed in enumerate(embed_urls, start=1):
+            log.info(f"     • ({i}/{len(embed_urls)}) {embed}")
+            m3u8, headers = await self.extract_m3u8(page, embed)
+            self.resolver.record(embed, BROWSER if m3u8 else UNRESOLVED)
+            if m3u8:
+                # what the player really sent, so a cache hit replays what the CDN accepted
+                self.cache.put(embed, m3u8, headers)
+                log.info(f"     ✅ Stream OK for {title}")
+                return m3u8
+        log.info(f"     ❌ No working streams ({len(embed_urls)} embeds)")
+        return None
+
+    async def resolve(self, matches, embeds):
+        """m3u8 (or None) per match, in match order; `embeds[i]` are the embed URLs of matches[i]."""
+        # cached streams that still answer need no browser at all
+        streams = await asyncio.gather(*(self.cached_stream(e) for e in embeds))
+        todo = [i for i, url in enumerate(streams) if not url and embeds[i]]
+
+        # then plain HTTP on the embed pages and their iframes; the browser only gets what is left
+        found = await asyncio.gather(*(self.static_stream(embeds[i]) for i in todo))
+        for i, url in zip(todo, found):
+            streams[i] = url
+        todo = [i for i, url in zip(todo, found) if not url]
+        log.info(f"💾 {len(matches) - len(todo)} matches settled from cache, over HTTP or without "
+                 f"embeds, {len(todo)} go to the browser")
+
+        latency = Latency()
+        blocker = ResourceBlocker()
+        pool = None
+        if todo:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True, channel="chrome-beta")
+
+                async def job(page, i):
+                    return await self.process_match(i + 1, matches[i], embeds[i], len(matches), page)
+
+                async with ContextPool(
+                    browser, self.workers, setup=blocker.attach, extra_http_headers=self.headers
+                ) as pool:
+                    found = await map_pool(pool, todo, job, latency)
+                await browser.close()
+            for i, url in zip(todo, found):
+                streams[i] = url
+
+        self.streams = sum(1 for url in streams if url)
+        log.info(self.resolver.summary())
+        if pool:
+            log.info(f"⏱️ Per-match latency ({self.workers} workers): {latency.summary()}")
+            log.info(blocker.summary())
+            log.info(pool.summary())
+        return streams
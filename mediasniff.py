@@ -0,0 +1,93 @@
+import time
+
+import httpclient
+from probecache import Probe
+
+# ---------- CONFIG ----------
+SNIFF_BYTES = 1024          # enough for 5 TS packets or any container header
+TS_PACKET = 188
+TS_PACKETS = 3              # sync bytes required in a row
+
+# sniffed kind -> canonical MIME type stored with the verdict
+KIND_TYPES = {
+    "hls": "application/vnd.apple.mpegurl",
+    "ts": "video/mp2t",
+    "mp4": "video/mp4",
+    "flv": "video/x-flv",
+    "audio": "audio/mpeg",
+}
+
+MP4_BOXES = (b"ftyp", b"styp", b"moof", b"moov")
+
+
+def classify(data):
+    """
+    Media kind from the first bytes of a body, or None when it is not a
+    stream: "hls" (#EXTM3U), "ts" (0x47 sync byte every 188 bytes), "mp4"
+    (ftyp/styp/moof/moov box), "flv" (FLV magic) or "audio" (ID3 tag or
+    MPEG audio frame sync).
+    """
+    head = data.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head.startswith(b"#EXTM3U"):
+        return "hls"
+    if data[:3] == b"FLV":
+        return "flv"
+    if data[4:8] in MP4_BOXES:
+        return "mp4"
+    # a TS stream may be cut mid-packet: look for the sync pattern in the first packet
+    for offset in range(min(TS_PACKET, len(data))):
+        if all(
+            offset + i * TS_PACKET < len(data) and data[offset + i * TS_PACKET] == 0x47
+            for i in range(TS_PACKETS)
+        ):
+            return "ts"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return "audio"
+    return None
+
+
+def _probe(status, data, ttfb):
+    kind = classify(data) if status < 400 else None
+    return Probe(kind is not None, status, KIND_TYPES.get(kind), ttfb)
+
+
+async def sniff(session, url, headers=None):
+    """One small Range GET on an aiohttp session, classified by its bytes."""
+    start = time.perf_counter()
+    try:
+        async with session.get(
+            url, headers={**(headers or {}), "Range": f"bytes=0-{SNIFF_BYTES - 1}"}
+        ) as r:
+            data = b""
+            if r.status < 400:
+                async for chunk in r.content.iter_chunked(SNIFF_BYTES):
+                    data += chunk
+                    if len(data) >= SNIFF_BYTES:
+                        break
+                if not r.content.at_eof():
+                    r.close()
+            return _probe(r.status, data, round(time.perf_counter() - start, 3))
+    except Exception:
+        return Probe(False)
+
+
+def sniff_sync(url, headers=None, timeout=None):
+    """Same as sniff() over the shared requests session."""
+    kwargs = {"timeout": timeout} if timeout else {}
+    start = time.perf_counter()
+    try:
+        with httpclient.get(
+            url,
+            headers={**(headers or {}), "Range": f"bytes=0-{SNIFF_BYTES - 1}"},
+            stream=True,
+            **kwargs,
+        ) as r:
+            data = b""
+            if r.status_code < 400:
+                for chunk in r.iter_content(SNIFF_BYTES):
+                    data += chunk
+                    if len(data) >= SNIFF_BYTES:
+                        break
+            return _probe(r.status_code, data, round(time.perf_counter() - start, 3))
+    except httpclient.RequestException:
+        return Probe(False)
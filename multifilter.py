@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from hlsprobe import HLSProber
+from m3u import parse_file, read_header, write_playlist
+from mediasniff import sniff
+from probecache import Probe
+from streamfilter import duration, probe_entries
+import vidaa
+
+# ---------- CONFIG ----------
+MAX_CONCURRENCY = 40
+
+# policy -> does it keep a probed entry? Same rules as the single-purpose filters:
+# online = phfilter, playable = nbalivefilter, fast = vidaa, unblocked = supersonic
+# (unblocked needs no probe, see keeps()). `speed` is only stored for a fast stream.
+POLICIES = {
+    "online": lambda p: p.status is not None and p.status < 400,
+    "playable": lambda p: p.content_type is not None,
+    "fast": lambda p: p.speed is not None,
+    "unblocked": lambda p: True,
+}
+NETWORK_POLICIES = {"online", "playable", "fast"}
+
+
+# ---------- PROBE ----------
+def check_name(policies):
+    """Cache/health key: the stored verdict depends on which network policies were asked for."""
+    return "multi:" + "+".join(sorted(policies & NETWORK_POLICIES))
+
+
+def keeps(policy, entry, probe):
+    """
+    Does `policy` keep the entry? A Probe without a status was never
+    answered (a failure, or the last-known verdict the deadline left it
+    with): its verdict stands for every network policy.
+    """
+    if policy == "unblocked":
+        return not vidaa.is_blocked(entry.url)
+    if probe.status is None:
+        return probe.verdict
+    return POLICIES[policy](probe)
+
+
+def make_probe(policies):
+    """
+    probe(session, url[, headers]) for probe_entries: one sniffing Range GET
+    for status and media kind, sent without headers like nbalivefilter, then
+    the HLS speed test only when the fast policy is wanted and the stream is
+    playable, with the entry's headers over vidaa's like vidaa. The Probe's
+    verdict is whether any of the network policies keeps the entry.
+    """
+    prober = None
+
+    async def probe(session, url, headers=None):
+        nonlocal prober
+        sniffed = await sniff(session, url)
+        speed = ttfb = None
+        if "fast" in policies and sniffed.verdict and not vidaa.is_blocked(url):
+            if prober is None:
+                # one per run: it remembers the master playlists it fetched
+                prober = HLSProber(
+                    session,
+                    accept=vidaa.is_fast,
+                    blocked=vidaa.is_blocked,
+                    sample_bytes=vidaa.SAMPLE_BYTES,
+                    warmup_bytes=vidaa.WARMUP_BYTES,
+                    retries=vidaa.RETRIES,
+                    max_depth=vidaa.MAX_HLS_DEPTH,
+                    segments=vidaa.SAMPLE_SEGMENTS,
+                    min_kbps=vidaa.MIN_SPEED_KBPS,
+                    confidence=vidaa.CONFIDENCE,
+                )
+            result = await vidaa.is_stream_fast(prober, url, {**vidaa.DEFAULT_HEADERS, **headers})
+            if result.verdict:
+                speed, ttfb = result.speed, result.ttfb
+        facts = Probe(sniffed.verdict, sniffed.status, sniffed.content_type, ttfb, speed)
+        return facts._replace(verdict=any(POLICIES[p](facts) for p in policies & NETWORK_POLICIES))
+
+    return probe
+
+
+async def probe_all(input_path, policies, concurrency, deadline):
+    """(index, entry, Probe) per http(s) entry, streamed from the input file."""
+    entries = (e for e in parse_file(input_path) if e.url.startswith(("http://", "https://")))
+    if not policies & NETWORK_POLICIES:
+        for i, entry in enumerate(entries):
+            yield i, entry, Probe(True)
+        return
+    # entry headers only matter to the speed test; without it targets are plain URLs
+    async for item in probe_entries(
+        entries, check_name(policies), make_probe(policies), concurrency, deadline,
+        headers="fast" in policies,
+    ):
+        yield item
+
+
+# ---------- MAIN ----------
+async def filter_playlist(input_path, outputs, concurrency=MAX_CONCURRENCY, deadline=None):
+    """`outputs` maps policy -> output path; every entry is probed once for all of them."""
+    policies = set(outputs)
+    kept = {policy: {} for policy in outputs}
+    total = 0
+    async for i, entry, result in probe_all(input_path, policies, concurrency, deadline):
+        total += 1
+        verdicts = []
+        for policy in POLICIES:
+            if policy in policies:
+                keep = keeps(policy, entry, result)
+                if keep:
+                    kept[policy][i] = entry
+                verdicts.append(f"{'✓' if keep else '✗'} {policy}")
+        print(f"{' '.join(verdicts)}: {entry.url}")
+
+    print()
+    header = read_header(input_path)
+    for policy, path in outputs.items():
+        entries = kept[policy]
+        write_playlist(path, (entries[i] for i in sorted(entries)), header)
+        print(f"💾 {policy.upper()}: {len(entries)}/{total} entries saved to {path}")
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Probe a playlist once and write one filtered playlist per verdict policy."
+    )
+    parser.add_argument("input", help="input .m3u/.m3u8")
+    for policy in POLICIES:
+        parser.add_argument(f"--{policy}", metavar="PATH",
+                            help=f"write the {policy} entries to PATH")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help=f"targets probed at once (default {MAX_CONCURRENCY})")
+    parser.add_argument("--deadline", type=duration,
+                        help="time budget for the whole run, e.g. 480s or 8m")
+    args = parser.parse_args()
+
+    outputs = {p: getattr(args, p) for p in POLICIES if getattr(args, p)}
+    if not outputs:
+        parser.error("give at least one of " + ", ".join(f"--{p}" for p in POLICIES))
+
+    if not Path(args.input).exists():
+        print("Input file does not exist.")
+        sys.exit(1)
+
+    asyncio.run(filter_playlist(args.input, outputs, args.concurrency, args.deadline))
@@ -1,85 +1,61 @@
-import requests
+import argparse
+import asyncio
 import sys
 from pathlib import Path
 
-TIMEOUT = 10  # seconds
-VALID_CONTENT_TYPES = [
-    "application/vnd.apple.mpegurl",  # .m3u8
-    "application/x-mpegURL",           # .m3u8
-    "video/mp4",
-    "audio/mpeg",
-    "video/ts",
-    "video/x-flv",
-]
+from m3u import parse_file, read_header, write_playlist
+from mediasniff import sniff
+from streamfilter import duration, probe_entries
 
-def is_stream_playable(url: str) -> bool:
-    """
-    Check if a stream URL is likely playable in a media player.
-    Checks HTTP status and content type.
-    """
-    try:
-        # Try HEAD first to get content type quickly
-        response = requests.head(url, timeout=TIMEOUT, allow_redirects=True)
-        if response.status_code < 400:
-            content_type = response.headers.get("Content-Type", "").split(";")[0]
-            if content_type in VALID_CONTENT_TYPES:
-                return True
-    except requests.RequestException:
-        pass
+CONCURRENCY = 20
+CHECK = "sniffed"
 
-    # Fallback to GET if HEAD fails or doesn't provide content type
-    try:
-        response = requests.get(url, timeout=TIMEOUT, stream=True)
-        if response.status_code < 400:
-            content_type = response.headers.get("Content-Type", "").split(";")[0]
-            return content_type in VALID_CONTENT_TYPES
-    except requests.RequestException:
-        return False
 
-    return False
+async def is_stream_playable(session, url: str):
+    """
+    Check if a stream URL is likely playable in a media player:
+    one small Range GET, classified by its first bytes (HLS, TS, MP4,
+    FLV, audio) whatever Content-Type the server claims.
+    """
+    return await sniff(session, url)
 
 
-def filter_m3u_playlist(input_path: str, output_path: str):
+async def filter_m3u_playlist(
+    input_path: str, output_path: str, concurrency: int = CONCURRENCY, deadline: float = None
+):
     """
     Reads an .m3u or .m3u8 playlist, filters playable URLs,
     and writes a new playlist.
     """
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = [line.rstrip() for line in f]
-
-    output_lines = []
-    buffer_tags = []
-
-    for line in lines:
-        if line.startswith("#"):
-            buffer_tags.append(line)
-        elif line.strip():
-            url = line.strip()
-            print(f"Checking: {url}")
-            if is_stream_playable(url):
-                print("  ✓ Playable")
-                output_lines.extend(buffer_tags)
-                output_lines.append(url)
-            else:
-                print("  ✗ Not playable")
-            buffer_tags = []
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(output_lines) + "\n")
+    # probes finish likely-alive first; the playlist keeps the input order
+    kept = {}
+    async for i, entry, result in probe_entries(
+        parse_file(input_path), CHECK, is_stream_playable, concurrency, deadline
+    ):
+        print(f"Checking: {entry.url}")
+        if result.verdict:
+            print("  ✓ Playable")
+            kept[i] = entry
+        else:
+            print("  ✗ Not playable")
+
+    write_playlist(output_path, (kept[i] for i in sorted(kept)), read_header(input_path))
 
     print(f"\nSaved filtered playlist to: {output_path}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python filter_m3u_playlist.py input.m3u output.m3u")
-        sys.exit(1)
-
-    input_m3u = sys.argv[1]
-    output_m3u = sys.argv[2]
-
-    if not Path(input_m3u).exists():
+    parser = argparse.ArgumentParser(description="Keep only the playable streams of a playlist.")
+    parser.add_argument("input", help="input .m3u/.m3u8")
+    parser.add_argument("output", help="filtered playlist to write")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"streams probed at once (default {CONCURRENCY})")
+    parser.add_argument("--deadline", type=duration,
+                        help="time budget for the whole run, e.g. 480s or 8m")
+    args = parser.parse_args()
+
+    if not Path(args.input).exists():
         print("Input file does not exist.")
         sys.exit(1)
 
-    filter_m3u_playlist(input_m3u, output_m3u)
+    asyncio.run(filter_m3u_playlist(args.input, args.output, args.concurrency, args.deadline))
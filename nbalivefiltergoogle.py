@@ -1,79 +1,41 @@
-import requests
 import sys
 from pathlib import Path
 
-TIMEOUT = 10
-VALID_CONTENT_TYPES = [
-    "application/vnd.apple.mpegurl",
-    "application/x-mpegURL",
-    "video/mp4",
-    "audio/mpeg",
-    "video/ts",
-    "video/x-flv",
-]
-
-def is_stream_playable(url: str, headers=None) -> bool:
-    headers = headers or {}
-    try:
-        response = requests.head(url, headers=headers, timeout=TIMEOUT, allow_redirects=True)
-        if response.status_code < 400:
-            content_type = response.headers.get("Content-Type", "").split(";")[0]
-            if content_type in VALID_CONTENT_TYPES:
-                return True
-    except requests.RequestException:
-        pass
+from m3u import parse_file
+from mediasniff import sniff_sync
+from probecache import Probe, ProbeCache
 
-    try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT, stream=True)
-        if response.status_code < 400:
-            content_type = response.headers.get("Content-Type", "").split(";")[0]
-            return content_type in VALID_CONTENT_TYPES
-    except requests.RequestException:
-        return False
+TIMEOUT = 10
 
-    return False
+def is_stream_playable(url: str, headers=None) -> Probe:
+    """One small Range GET, classified by its first bytes instead of Content-Type."""
+    return sniff_sync(url, headers, timeout=TIMEOUT)
 
 def filter_m3u_playlist(input_path: str, output_path: str):
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = [line.rstrip() for line in f]
+    output_lines = ["#EXTM3U"]
 
-    output_lines = []
-    buffer_tags = []
-    buffer_vlcopt = []
-
-    for line in lines:
-        if line.startswith("#EXTINF"):
-            buffer_tags.append(line)
-        elif line.startswith("#EXTVLCOPT"):
-            buffer_vlcopt.append(line)
-        elif line.strip():
-            url = line.strip()
+    with ProbeCache("sniffed") as cache:
+        for entry in parse_file(input_path):
+            url = entry.url
             # Convert VLC options to HTTP headers
-            headers = {}
-            for opt in buffer_vlcopt:
-                if opt.startswith("#EXTVLCOPT:"):
-                    key_value = opt[len("#EXTVLCOPT:"):].split("=", 1)
-                    if len(key_value) == 2:
-                        key, value = key_value
-                        key = key.lower()
-                        if key == "http-referrer":
-                            headers["Referer"] = value
-                        elif key == "http-origin":
-                            headers["Origin"] = value
-                        elif key == "http-user-agent":
-                            headers["User-Agent"] = value
+            headers = entry.request_headers()
 
             print(f"Checking: {url}")
-            if is_stream_playable(url, headers=headers):
+            result = cache.get(url, headers)
+            if result is None:
+                result = is_stream_playable(url, headers=headers)
+                cache.put(url, headers, result)
+
+            if result.verdict:
                 print("  ✓ Playable")
-                output_lines.extend(buffer_tags)
-                output_lines.extend(buffer_vlcopt)
+                if entry.extinf:
+                    output_lines.append(entry.extinf)
+                output_lines.extend(entry.vlcopts())
                 output_lines.append(url)
             else:
                 print("  ✗ Not playable")
 
-            buffer_tags = []
-            buffer_vlcopt = []
+        cache.report()
 
     with open(output_path, "w", encoding="utf-8") as f:
         f.write("\n".join(output_lines) + "\n")
@@ -1,68 +1,61 @@
-import requests
+import argparse
+import asyncio
+import os
 import sys
 from pathlib import Path
 
-TIMEOUT = 10  # seconds
+from m3u import parse_file, read_header, write_playlist
+from streamfilter import head_then_get, probe_entries
 
+CONCURRENCY = 20
+CHECK = "online"
 
-def is_stream_online(url: str) -> bool:
+
+async def is_stream_online(session, url: str):
     """
     Check if a stream URL is reachable.
     Uses HEAD first, falls back to GET if needed.
     """
-    try:
-        response = requests.head(url, timeout=TIMEOUT, allow_redirects=True)
-        if response.status_code < 400:
-            return True
-    except requests.RequestException:
-        pass
-
-    try:
-        response = requests.get(url, timeout=TIMEOUT, stream=True)
-        return response.status_code < 400
-    except requests.RequestException:
-        return False
-
-
-def filter_m3u8(input_path: str, output_path: str):
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = [line.rstrip() for line in f]
-
-    output_lines = []
-    buffer_tags = []
-
-    for line in lines:
-        if line.startswith("#"):
-            buffer_tags.append(line)
-        elif line.strip():
-            url = line.strip()
-            print(f"Checking: {url}")
-
-            if is_stream_online(url):
+    return await head_then_get(session, url, lambda status, _: status < 400)
+
+
+async def filter_m3u8(input_path: str, output_path: str, concurrency: int = CONCURRENCY):
+    # probes finish likely-alive first: online entries go to
+    # `<output>.partial` as they come (flushed, so a killed run still leaves
+    # them on disk), the final playlist keeps the input order
+    header = read_header(input_path)
+    partial_path = output_path + ".partial"
+    kept = {}
+    with open(partial_path, "w", encoding="utf-8") as partial:
+        partial.write(header + "\n")
+        async for i, entry, result in probe_entries(
+            parse_file(input_path), CHECK, is_stream_online, concurrency
+        ):
+            print(f"Checking: {entry.url}")
+            if result.verdict:
                 print("  ✓ Online")
-                output_lines.extend(buffer_tags)
-                output_lines.append(url)
+                kept[i] = entry
+                partial.write("".join(line + "\n" for line in entry.lines()))
+                partial.flush()
             else:
                 print("  ✗ Offline")
 
-            buffer_tags = []
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(output_lines) + "\n")
+    write_playlist(output_path, (kept[i] for i in sorted(kept)), header)
+    os.remove(partial_path)
 
     print(f"\nSaved filtered playlist to: {output_path}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python filter_m3u8.py input.m3u8 output.m3u8")
-        sys.exit(1)
-
-    input_m3u8 = sys.argv[1]
-    output_m3u8 = sys.argv[2]
-
-    if not Path(input_m3u8).exists():
+    parser = argparse.ArgumentParser(description="Keep only the online streams of a playlist.")
+    parser.add_argument("input", help="input .m3u/.m3u8")
+    parser.add_argument("output", help="filtered playlist to write")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help=f"streams probed at once (default {CONCURRENCY})")
+    args = parser.parse_args()
+
+    if not Path(args.input).exists():
         print("Input file does not exist.")
         sys.exit(1)
 
-    filter_m3u8(input_m3u8, output_m3u8)
+    asyncio.run(filter_m3u8(args.input, args.output, args.concurrency))
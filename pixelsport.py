@@ -1,6 +1,4 @@
-import json
-import urllib.request
-from urllib.error import URLError, HTTPError
+import httpclient
 
 BASE = "https://pixelsport.tv"
 API_EVENTS = f"{BASE}/backend/liveTV/events"
@@ -32,12 +30,11 @@ def fetch_json(url):
         "User-Agent": VLC_USER_AGENT,
         "Referer": VLC_REFERER,
         "Accept": "*/*",
-        "Connection": "close",
         "Icy-MetaData": VLC_ICY,
     }
-    req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    resp = httpclient.get(url, headers=headers, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
 
 
 def collect_links(obj, prefix=""):
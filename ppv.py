@@ -3,7 +3,17 @@ from playwright.async_api import async_playwright
 import aiohttp
 from datetime import datetime
 
+import httpclient
+from browserpool import ContextPool
+from embedcache import EmbedCache
+from resourceblock import ResourceBlocker
+from streamcapture import GRACE_SECONDS, StreamCapture
+from tieredresolver import BROWSER, UNRESOLVED, TieredResolver
+
 API_URL = "https://api.ppv.to/api/streams"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0"
+AUTOPLAY_TIMEOUT = 5    # before clicking the player
+CAPTURE_TIMEOUT = 8     # after the click
 
 CUSTOM_HEADERS = [
     '#EXTVLCOPT:http-origin=https://modistreams.org',
@@ -92,22 +102,23 @@ COLLEGE_TEAMS = {
 }
 
 # --- CORRECTED FUNCTION #1 ---
-async def check_m3u8_url(url, referer):
-    """Checks the M3U8 URL using the correct referer for validation."""
+async def check_m3u8_url(url, referer, sent_headers=None):
+    """Checks the M3U8 URL using the correct referer (or the headers it was captured with)."""
     try:
         # Dynamically generate the origin from the referer URL
         origin = "https://" + referer.split('/')[2]
         headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0",
+            "User-Agent": USER_AGENT,
             "Referer": referer,
-            "Origin": origin
+            "Origin": origin,
+            **(sent_headers or {}),
         }
         timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, headers=headers) as resp:
-                # A 200 (OK) or 403 (Forbidden) can both indicate a working link,
-                # as some servers block direct file access but confirm the path exists.
-                return resp.status in [200, 403]
+        session = httpclient.shared_async_session()
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            # A 200 (OK) or 403 (Forbidden) can both indicate a working link,
+            # as some servers block direct file access but confirm the path exists.
+            return resp.status in [200, 403]
     except Exception as e:
         print(f"❌ Error checking {url}: {e}")
         return False
@@ -118,61 +129,58 @@ async def get_streams():
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0'
         }
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            print(f"🌐 Fetching streams from {API_URL}")
-            async with session.get(API_URL) as resp:
-                print(f"🔍 Response status: {resp.status}")
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    print(f"❌ Error response: {error_text[:500]}")
-                    return None
-                return await resp.json()
+        session = httpclient.shared_async_session()
+        print(f"🌐 Fetching streams from {API_URL}")
+        async with session.get(API_URL, headers=headers, timeout=timeout) as resp:
+            print(f"🔍 Response status: {resp.status}")
+            if resp.status != 200:
+                error_text = await resp.text()
+                print(f"❌ Error response: {error_text[:500]}")
+                return None
+            return await resp.json()
     except Exception as e:
         print(f"❌ Error in get_streams: {str(e)}")
         return None
 
 # --- CORRECTED FUNCTION #2 ---
 async def grab_m3u8_from_iframe(page, iframe_url):
-    found_streams = set()
-    def handle_response(response):
-        if ".m3u8" in response.url:
-            print(f"✅ Found M3U8 Stream: {response.url}")
-            found_streams.add(response.url)
-
-    page.on("response", handle_response)
-    print(f"🌐 Navigating to iframe: {iframe_url}")
-    try:
-        await page.goto(iframe_url, timeout=30000, wait_until="domcontentloaded")
-    except Exception as e:
-        print(f"❌ Failed to load iframe page: {e}")
-        page.remove_listener("response", handle_response)
-        return set()
-
-    try:
-        await page.wait_for_timeout(5000)
-        nested_iframe = page.locator("iframe")
-        if await nested_iframe.count() > 0:
-            print("🔎 Found nested iframe, attempting to click inside it.")
-            player_frame = page.frame_locator("iframe").first
-            # Use force=True to click even if the element is not "visible"
-            await player_frame.locator("body").click(timeout=5000, force=True)
-        else:
-            print("🖱️ No nested iframe found. Clicking main page body.")
-            await page.locator("body").click(timeout=5000, force=True)
-    except Exception as e:
-        print(f"⚠️ Clicking failed, but proceeding anyway. Error: {e}")
-
-    print("⏳ Waiting 8s for stream to be requested...")
-    await asyncio.sleep(8)
-    page.remove_listener("response", handle_response)
+    # resolves on the first .m3u8 response instead of fixed 5 s + 8 s sleeps
+    with StreamCapture(page, events=("response",)) as capture:
+        print(f"🌐 Navigating to iframe: {iframe_url}")
+        try:
+            await page.goto(iframe_url, timeout=30000, wait_until="domcontentloaded")
+        except Exception as e:
+            print(f"❌ Failed to load iframe page: {e}")
+            return set(), {}
+
+        # an autoplaying player needs no click
+        if not await capture.wait(AUTOPLAY_TIMEOUT):
+            try:
+                nested_iframe = page.locator("iframe")
+                if await nested_iframe.count() > 0:
+                    print("🔎 Found nested iframe, attempting to click inside it.")
+                    player_frame = page.frame_locator("iframe").first
+                    # Use force=True to click even if the element is not "visible"
+                    await player_frame.locator("body").click(timeout=5000, force=True)
+                else:
+                    print("🖱️ No nested iframe found. Clicking main page body.")
+                    await page.locator("body").click(timeout=5000, force=True)
+            except Exception as e:
+                print(f"⚠️ Clicking failed, but proceeding anyway. Error: {e}")
+
+        print(f"⏳ Waiting up to {CAPTURE_TIMEOUT}s for stream to be requested...")
+        found_streams = set(await capture.wait(CAPTURE_TIMEOUT, GRACE_SECONDS))
+        sent_headers = capture.headers
+    for url in found_streams:
+        print(f"✅ Found M3U8 Stream: {url}")
 
     if not found_streams:
         print(f"❌ No M3U8 URLs were captured for {iframe_url}")
-        return set()
+        return set(), {}
 
     valid_urls = set()
     # Pass the correct iframe_url as the referer to the check function
-    tasks = [check_m3u8_url(url, iframe_url) for url in found_streams]
+    tasks = [check_m3u8_url(url, iframe_url, sent_headers.get(url)) for url in found_streams]
     results = await asyncio.gather(*tasks)
     
     for url, is_valid in zip(found_streams, results):
@@ -181,7 +189,7 @@ async def grab_m3u8_from_iframe(page, iframe_url):
         else:
             print(f"🗑️ Discarding invalid or unreachable URL: {url}")
             
-    return valid_urls
+    return valid_urls, sent_headers
 
 async def grab_live_now_from_html(page, base_url="https://ppv.to/"):
     print("🌐 Scraping 'Live Now' streams from HTML...")
@@ -212,6 +220,32 @@ async def grab_live_now_from_html(page, base_url="https://ppv.to/"):
     print(f"✅ Found {len(live_now_streams)} 'Live Now' streams")
     return live_now_streams
 
+async def cached_urls(cache, iframe_url):
+    """{m3u8} when the iframe's cached stream still passes check_m3u8_url, else empty."""
+    m3u8 = await cache.revalidate(iframe_url, lambda url, headers: check_m3u8_url(url, iframe_url, headers))
+    return {m3u8} if m3u8 else set()
+
+def remember(cache, iframe_url, urls, sent_headers=None):
+    # build_m3u writes the first URL of the set, so that is the one worth keeping,
+    # with the headers the browser requested it with when it was captured
+    if urls:
+        url = next(iter(urls))
+        cache.put(iframe_url, url, (sent_headers or {}).get(url) or {"Referer": iframe_url})
+
+async def static_urls(resolver, cache, iframe_url):
+    """{m3u8} when the iframe page or its nested iframes expose one over plain HTTP, else empty."""
+    m3u8 = await resolver.resolve_static(iframe_url, lambda url: check_m3u8_url(url, iframe_url))
+    urls = {m3u8} if m3u8 else set()
+    remember(cache, iframe_url, urls)
+    return urls
+
+async def browser_urls(pool, resolver, cache, iframe_url):
+    async with pool.page() as page:
+        urls, sent_headers = await grab_m3u8_from_iframe(page, iframe_url)
+    resolver.record(iframe_url, BROWSER if urls else UNRESOLVED)
+    remember(cache, iframe_url, urls, sent_headers)
+    return urls
+
 def build_m3u(streams, url_map):
     lines = ['#EXTM3U url-tvg="https://epgshare01.online/epgshare01/epg_ripper_DUMMY_CHANNELS.xml.gz"']
     seen_names = set()
@@ -261,6 +295,7 @@ async def main():
         print("❌ No valid data received from the API")
         if data:
             print(f"API Response: {data}")
+        await httpclient.close_async_session()
         return
 
     print(f"✅ Found {len(data['streams'])} categories")
@@ -290,37 +325,64 @@ async def main():
             deduped_streams.append(s)
     streams = deduped_streams
 
+    # iframes whose cached m3u8 still answers skip the browser
+    cache = EmbedCache()
+    cached = await asyncio.gather(*(cached_urls(cache, s["iframe"]) for s in streams))
+    url_map = {
+        f"{s['name']}::{s['category']}::{s['iframe']}": urls for s, urls in zip(streams, cached)
+    }
+    print(f"💾 {sum(1 for urls in cached if urls)}/{len(streams)} streams resolved from cache")
+
+    # then plain HTTP on the iframe pages; the browser only gets what is left
+    resolver = TieredResolver({"User-Agent": USER_AGENT})
+    todo = [s for s in streams if not url_map[f"{s['name']}::{s['category']}::{s['iframe']}"]]
+    found = await asyncio.gather(*(static_urls(resolver, cache, s["iframe"]) for s in todo))
+    for s, urls in zip(todo, found):
+        url_map[f"{s['name']}::{s['category']}::{s['iframe']}"] = urls
+    print(f"🪜 {sum(1 for urls in found if urls)}/{len(todo)} streams resolved over plain HTTP")
+
     async with async_playwright() as p:
         # For debugging, you can set headless=False to watch the browser
         browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-        url_map = {}
-
-        total_streams = len(streams)
-        for idx, s in enumerate(streams, start=1):
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
-            print(f"\n🔎 Scraping stream {idx}/{total_streams}: {s['name']} ({s['category']})")
-            urls = await grab_m3u8_from_iframe(page, s["iframe"])
-            if urls:
-                print(f"✅ Got {len(urls)} stream(s) for {s['name']} ({idx}/{total_streams})")
-            else:
-                print(f"⚠️ No valid streams for {s['name']} ({idx}/{total_streams})")
-            url_map[key] = urls
-
-        # Process Live Now
-        live_now_streams = await grab_live_now_from_html(page)
-        for s in live_now_streams:
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
-            urls = await grab_m3u8_from_iframe(page, s["iframe"])
-            if urls:
-                print(f"✅ Got {len(urls)} 'Live Now' stream(s) for {s['name']}")
-            else:
-                print(f"⚠️ No valid 'Live Now' streams for {s['name']}")
-            url_map[key] = urls
+        blocker = ResourceBlocker()
+
+        # one warm page, reset between iframes and replaced as it ages
+        async with ContextPool(browser, size=1, setup=blocker.attach) as pool:
+            total_streams = len(streams)
+            for idx, s in enumerate(streams, start=1):
+                key = f"{s['name']}::{s['category']}::{s['iframe']}"
+                if url_map[key]:
+                    continue
+                print(f"\n🔎 Scraping stream {idx}/{total_streams}: {s['name']} ({s['category']})")
+                urls = await browser_urls(pool, resolver, cache, s["iframe"])
+                if urls:
+                    print(f"✅ Got {len(urls)} stream(s) for {s['name']} ({idx}/{total_streams})")
+                else:
+                    print(f"⚠️ No valid streams for {s['name']} ({idx}/{total_streams})")
+                url_map[key] = urls
+
+            # Process Live Now
+            async with pool.page() as page:
+                live_now_streams = await grab_live_now_from_html(page)
+            for s in live_now_streams:
+                key = f"{s['name']}::{s['category']}::{s['iframe']}"
+                urls = (await cached_urls(cache, s["iframe"])
+                        or await static_urls(resolver, cache, s["iframe"])
+                        or await browser_urls(pool, resolver, cache, s["iframe"]))
+                if urls:
+                    print(f"✅ Got {len(urls)} 'Live Now' stream(s) for {s['name']}")
+                else:
+                    print(f"⚠️ No valid 'Live Now' streams for {s['name']}")
+                url_map[key] = urls
         streams.extend(live_now_streams)
 
         await browser.close()
+        print(blocker.summary())
+        print(pool.summary())
+    await httpclient.close_async_session()
+    print(resolver.summary())
+    print(f"💾 Cache: {cache.summary()}")
+    cache.close()
 
     print("\n💾 Writing final playlist to PPV.m3u8 ...")
     playlist = build_m3u(streams, url_map)
@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import time
+from collections import namedtuple
+
+# ---------- CONFIG ----------
+CACHE_DB = "probe_cache.sqlite3"
+ALIVE_TTL = 6 * 3600    # a working stream is trusted for 6 hours
+DEAD_TTL = 30 * 60      # a dead one is retried after 30 minutes
+COMMIT_EVERY = 200      # results buffered before a commit
+
+# verdict: bool; status/content_type/ttfb/speed may be None when unknown
+Probe = namedtuple("Probe", "verdict status content_type ttfb speed",
+                   defaults=(None, None, None, None))
+
+
+def headers_key(headers):
+    """Stable text form of the effective request headers."""
+    return json.dumps({k.lower(): v for k, v in (headers or {}).items()}, sort_keys=True)
+
+
+class ProbeCache:
+    """
+    On-disk probe results keyed by (check, URL, effective headers).
+    `check` names the test that produced the verdict ("online", "playable",
+    "fast"...), so scripts sharing the database never reuse each other's
+    verdicts. Alive and dead results expire after different TTLs.
+    """
+
+    def __init__(self, check, path=CACHE_DB, alive_ttl=ALIVE_TTL, dead_ttl=DEAD_TTL):
+        self.check = check
+        self.alive_ttl = alive_ttl
+        self.dead_ttl = dead_ttl
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS probes (
+                   check_name TEXT NOT NULL,
+                   url TEXT NOT NULL,
+                   headers TEXT NOT NULL,
+                   verdict INTEGER NOT NULL,
+                   status INTEGER,
+                   content_type TEXT,
+                   ttfb REAL,
+                   speed REAL,
+                   checked_at REAL NOT NULL,
+                   PRIMARY KEY (check_name, url, headers)
+               )"""
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, url, headers=None):
+        """Fresh cached Probe for url + headers, or None when it must be probed."""
+        row = self.db.execute(
+            "SELECT verdict, status, content_type, ttfb, speed, checked_at FROM probes "
+            "WHERE check_name = ? AND url = ? AND headers = ?",
+            (self.check, url, headers_key(headers)),
+        ).fetchone()
+        if row:
+            ttl = self.alive_ttl if row[0] else self.dead_ttl
+            if time.time() - row[5] < ttl:
+                self.hits += 1
+                return Probe(bool(row[0]), *row[1:5])
+        self.misses += 1
+        return None
+
+    def put(self, url, headers, probe):
+        self.db.execute(
+            "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.check, url, headers_key(headers), int(probe.verdict), probe.status,
+             probe.content_type, probe.ttfb, probe.speed, time.time()),
+        )
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.db.commit()
+            self._pending = 0
+
+    def close(self):
+        # drop rows no TTL can make fresh again
+        self.db.execute(
+            "DELETE FROM probes WHERE check_name = ? AND checked_at < ?",
+            (self.check, time.time() - max(self.alive_ttl, self.dead_ttl)),
+        )
+        self.db.commit()
+        self.db.close()
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        print(f"💾 Probe cache: {self.hits}/{total} hits ({rate:.1f}%), {self.misses} misses")
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+import time
+
+import aiohttp
+
+import httpclient
+from hlsprobe import HLSProber
+
+# ---------- CONFIG ----------
+TIMEOUT = aiohttp.ClientTimeout(total=15)
+MAX_CONCURRENCY = 20
+SAMPLE_BYTES = 256_000      # throughput sample from the first segment
+CACHE_FILE = "quality_cache.json"
+CACHE_TTL = 6 * 3600        # seconds
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+class QualityCache:
+    """Measured quality per URL, stored as JSON and expired after `ttl` seconds."""
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.data = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                self.data = {}
+
+    def get(self, url):
+        result = self.data.get(url)
+        if result and time.time() - result["measured_at"] < self.ttl:
+            self.hits += 1
+            return result
+        self.misses += 1
+        return None
+
+    def put(self, url, result):
+        self.data[url] = result
+
+    def save(self):
+        now = time.time()
+        fresh = {u: r for u, r in self.data.items() if now - r["measured_at"] < self.ttl}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(fresh, f)
+        os.replace(tmp, self.path)
+
+
+async def measure(prober, url, headers=None):
+    """
+    Measure one stream: advertised BANDWIDTH/RESOLUTION of the best variant
+    of the HLS master playlist, TTFB of the first request and throughput on
+    the first media segment. Returns a JSON-able dict; ok=False on failure.
+    """
+    result = await prober.probe(url, headers)
+    best = max(result.variants, key=lambda v: v.bandwidth, default=None)
+    return {
+        "ok": result.ok,
+        "bandwidth": best.bandwidth if best else 0,
+        "pixels": best.pixels if best else 0,
+        "ttfb": result.ttfb,
+        "kbps": result.kbps or 0.0,
+        "measured_at": time.time(),
+    }
+
+
+async def measure_all(targets, cache):
+    """Measure (url, headers) pairs not fresh in `cache`. Returns {url: result}."""
+    results = {}
+    todo = {}
+    for url, headers in targets:
+        cached = cache.get(url)
+        if cached:
+            results[url] = cached
+        else:
+            todo[url] = headers
+    if not todo:
+        return results
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    async with httpclient.async_session(per_host=6, ssl=False, timeout=TIMEOUT,
+                                        headers=DEFAULT_HEADERS) as session:
+        prober = HLSProber(session, variant="best", sample_bytes=SAMPLE_BYTES,
+                           warmup_bytes=0, retries=1)
+
+        async def worker(url, headers):
+            async with semaphore:
+                result = await measure(prober, url, headers)
+            cache.put(url, result)
+            results[url] = result
+
+        await asyncio.gather(*(worker(u, h) for u, h in todo.items()))
+    return results
+
+
+def quality_rank(result):
+    """Sort key, lower is better: alive, resolution, bandwidth, throughput, TTFB."""
+    if not result or not result["ok"]:
+        return (1, 0, 0, 0, float("inf"))
+    return (0, -result["pixels"], -result["bandwidth"], -result["kbps"], result["ttfb"] or 0)
@@ -0,0 +1,148 @@
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+# ---------- CONFIG ----------
+# Playwright resource types never needed to find a stream URL. Stylesheets
+# stay allowed: the click sequences depend on the player's layout.
+DENY_TYPES = {"image", "font", "media", "texttrack", "manifest", "beacon", "ping"}
+
+# ad networks, trackers and player analytics (a host or any subdomain of it)
+DENY_HOSTS = {
+    "prd.jwpltx.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "adnxs.com",
+    "popads.net",
+    "popcash.net",
+    "propellerads.com",
+    "adsterra.com",
+    "exoclick.com",
+    "juicyads.com",
+    "histats.com",
+    "hotjar.com",
+    "scorecardresearch.com",
+    "cloudflareinsights.com",
+    "onclickads.net",
+}
+
+# media segments: only the playlist matters, so once a page has requested
+# its first .m3u8 the player may not download video
+SEGMENT_RE = re.compile(r"\.(?:ts|m4s|m4v|m4a|aac|mp4|fmp4|webm)(?:[?#]|$)", re.IGNORECASE)
+
+# rough transfer size of what a blocked request would have fetched, for the report
+ESTIMATED_BYTES = {
+    "image": 40_000,
+    "font": 50_000,
+    "media": 500_000,
+    "script": 60_000,
+    "segment": 800_000,
+}
+DEFAULT_ESTIMATE = 10_000
+
+
+def host_matches(host, patterns):
+    return any(host == p or host.endswith("." + p) for p in patterns)
+
+
+class ResourceBlocker:
+    """
+    Route-based request blocking shared by the browser scrapers. Attach it
+    to a context (or page) with attach() / attach_sync(); every request is
+    checked against, in order:
+
+      allow_hosts   always let through (e.g. the player's own CDN)
+      playlists     .m3u8 requests, whatever their type or host: they are
+                    what the scrapers wait for
+      deny_hosts    ad networks, trackers, player analytics
+      deny_types    images, fonts, media...
+      segments      media segments once the page has requested a .m3u8
+
+    Counts what it blocked by reason, with a rough estimate of the bytes
+    saved.
+    """
+
+    def __init__(self, deny_types=DENY_TYPES, deny_hosts=DENY_HOSTS, allow_hosts=(),
+                 block_segments=True):
+        self.deny_types = set(deny_types)
+        self.deny_hosts = set(deny_hosts)
+        self.allow_hosts = set(allow_hosts)
+        self.block_segments = block_segments
+        self._playlist_pages = set()    # pages that already requested a .m3u8
+        self.allowed = 0
+        self.blocked = Counter()        # reason -> requests
+        self.bytes_saved = 0
+
+    # ---------- RULES ----------
+    def reason(self, url, resource_type, page=None):
+        """Why a request should be blocked, or None to let it through."""
+        host = urlsplit(url).hostname or ""
+        if host_matches(host, self.allow_hosts):
+            return None
+        if ".m3u8" in url:
+            # players often load the playlist as "media"; it must get through
+            if page is not None:
+                self._playlist_pages.add(page)
+            return None
+        if host_matches(host, self.deny_hosts):
+            return "ad host"
+        if resource_type in self.deny_types:
+            return resource_type
+        if self.block_segments and page in self._playlist_pages and SEGMENT_RE.search(url):
+            return "segment"
+        return None
+
+    def _check(self, request):
+        try:
+            frame = request.frame
+            page = frame.page
+            if request.is_navigation_request() and frame.parent_frame is None:
+                # a new document in the tab: its first playlist is still to come
+                self._playlist_pages.discard(page)
+        except Exception:
+            page = None     # service worker requests have no frame
+
+        reason = self.reason(request.url, request.resource_type, page)
+        if reason is None:
+            self.allowed += 1
+        else:
+            self.blocked[reason] += 1
+            self.bytes_saved += ESTIMATED_BYTES.get(
+                "segment" if reason == "segment" else request.resource_type, DEFAULT_ESTIMATE
+            )
+        return reason
+
+    # ---------- PLAYWRIGHT ----------
+    async def _handle(self, route):
+        if self._check(route.request):
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    def _handle_sync(self, route):
+        if self._check(route.request):
+            route.abort("blockedbyclient")
+        else:
+            route.continue_()
+
+    async def attach(self, target):
+        """Route every request of an async-API BrowserContext or Page through the rules."""
+        await target.route("**/*", self._handle)
+
+    def attach_sync(self, target):
+        """Same as attach() for the sync API."""
+        target.route("**/*", self._handle_sync)
+
+    # ---------- REPORT ----------
+    def summary(self):
+        total = sum(self.blocked.values())
+        seen = total + self.allowed
+        rate = 100 * total / seen if seen else 0.0
+        reasons = ", ".join(f"{r} {n}" for r, n in self.blocked.most_common()) or "nothing"
+        return (f"🛡️ Blocked {total}/{seen} requests ({rate:.0f}%): {reasons}; "
+                f"~{self.bytes_saved / 1e6:.1f} MB saved (estimated)")
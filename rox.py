@@ -1,10 +1,11 @@
-import requests
 import re
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from requests.exceptions import RequestException
 import logging
 
+import httpclient
+
 BASE_URL = "https://roxiestreams.live"
 
 TV_INFO = {
@@ -24,7 +25,8 @@ TV_INFO = {
 DISCOVERY_KEYWORDS = list(TV_INFO.keys()) + ['streams']
 SECTION_BLOCKLIST = ['olympia']
 
-SESSION = requests.Session()
+# own session: these headers must not leak into httpclient's shared one
+SESSION = httpclient.PooledSession()
 SESSION.headers.update({
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Referer': BASE_URL
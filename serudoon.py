@@ -1,10 +1,11 @@
-import requests
 import random
 import time
 import sys
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+import httpclient
+
 # Konstanta path
 MAPPING_FILE = Path.home() / "cool_mapping.txt"
 CACHE_FILE = Path("proxy_cache.txt")
@@ -45,7 +46,7 @@ def parse_mapping_file(path):
 
 def get_proxy_list(url):
     try:
-        res = requests.get(url, timeout=10)
+        res = httpclient.get(url, timeout=10)
         res.raise_for_status()
         return res.text.strip().splitlines()
     except Exception as e:
@@ -56,7 +57,7 @@ def try_proxy(api_url, proxy, headers):
     proxies = {"http": proxy, "https": proxy}
     try:
         print(f"[•] Mencoba proxy: {proxy}", file=sys.stderr)
-        res = requests.get(api_url, headers=headers, proxies=proxies, timeout=10)
+        res = httpclient.get(api_url, headers=headers, proxies=proxies, timeout=10)
         res.raise_for_status()
         return res.json()
     except Exception as e:
@@ -0,0 +1,74 @@
+import asyncio
+
+# ---------- CONFIG ----------
+CAPTURE_TIMEOUT = 8.0       # ceiling for a playlist to show up
+GRACE_SECONDS = 1.5         # extra time to collect alternate variants
+# request headers a CDN may check, kept so the playlist can be fetched again
+REPLAY_HEADERS = {"referer": "Referer", "origin": "Origin", "user-agent": "User-Agent"}
+
+
+def is_playlist(url):
+    return ".m3u8" in url
+
+
+def replay_headers(request):
+    """Referer/Origin/User-Agent a Playwright request was actually sent with."""
+    try:
+        sent = request.headers
+    except Exception:
+        return {}
+    return {name: sent[key] for key, name in REPLAY_HEADERS.items() if sent.get(key)}
+
+
+class StreamCapture:
+    """
+    Watches a page for .m3u8 requests or responses (async Playwright API).
+    Use as a context manager around the navigation and clicks; wait()
+    returns as soon as the first playlist is seen instead of sleeping a
+    fixed time. `headers[url]` holds the replayable headers the page sent
+    for each playlist.
+
+        with StreamCapture(page) as capture:
+            await page.goto(url)
+            urls = await capture.wait(timeout=8)
+    """
+
+    def __init__(self, page, events=("request",), match=is_playlist, ignore=()):
+        self.page = page
+        self.events = events
+        self.match = match
+        self.ignore = ignore
+        self.urls = []              # in the order they were seen, no duplicates
+        self.headers = {}           # url -> replay_headers() of its request
+        self._seen = asyncio.Event()
+
+    def __enter__(self):
+        for event in self.events:
+            self.page.on(event, self._on_event)
+        return self
+
+    def __exit__(self, *exc):
+        for event in self.events:
+            self.page.remove_listener(event, self._on_event)
+
+    def _on_event(self, message):
+        url = message.url
+        if self.match(url) and url not in self.urls and not any(i in url for i in self.ignore):
+            self.urls.append(url)
+            # response events carry the request that fetched them
+            self.headers[url] = replay_headers(getattr(message, "request", message))
+            self._seen.set()
+
+    async def wait(self, timeout=CAPTURE_TIMEOUT, grace=0.0):
+        """
+        Playlist URLs seen so far, waiting up to `timeout` seconds for the
+        first one and then `grace` seconds more for alternates. Empty when
+        nothing showed up in time.
+        """
+        try:
+            await asyncio.wait_for(self._seen.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        if grace:
+            await asyncio.sleep(grace)
+        return list(self.urls)
@@ -0,0 +1,241 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+import httpclient
+from health import HealthHistory
+from probecache import Probe, ProbeCache, headers_key
+
+# Probe tasks kept alive at once, as a multiple of the probe concurrency.
+WINDOW_FACTOR = 4
+MAX_VERDICTS = 50_000       # finished probe verdicts ProbeDeduper keeps for duplicates
+PER_HOST_LIMIT = 6
+# same semantics as requests' timeout=10: per connect / per read, no total
+PROBE_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=10)
+
+# ---------- DEADLINE ----------
+WRITE_MARGIN = 10           # seconds kept back to write the playlist
+MAX_PROBE_SECONDS = 20      # one probe never gets more, even with time to spare
+MIN_PROBE_SECONDS = 2       # below this a probe is not worth starting
+
+
+async def as_completed_bounded(coros, limit):
+    """
+    Like asyncio.as_completed, but pulls coroutines lazily from an iterable
+    and keeps at most `limit` tasks alive, so a huge playlist never turns
+    into a huge list of pending tasks. Yields results as they finish.
+    """
+    coros = iter(coros)
+    pending = {asyncio.ensure_future(c) for c in itertools.islice(coros, limit)}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for coro in itertools.islice(coros, len(done)):
+            pending.add(asyncio.ensure_future(coro))
+        for task in done:
+            yield task.result()
+
+
+class Deadline:
+    """
+    Global time budget for a run. Probe timeouts shrink as the budget runs
+    out so the queue still fits, and nothing starts once it is spent.
+    """
+
+    def __init__(self, seconds, margin=WRITE_MARGIN):
+        self.at = time.monotonic() + seconds - margin
+
+    def remaining(self):
+        return max(0.0, self.at - time.monotonic())
+
+    def probe_timeout(self, queued, concurrency):
+        """Seconds for the next probe, or None when there is no time left for one."""
+        remaining = self.remaining()
+        if remaining < MIN_PROBE_SECONDS:
+            return None
+        fair = remaining * concurrency / max(queued, 1)
+        return min(MAX_PROBE_SECONDS, max(MIN_PROBE_SECONDS, fair), remaining)
+
+
+def duration(text):
+    """argparse type for "480", "480s" or "8m"."""
+    text = text.strip().lower()
+    if text.endswith("m"):
+        return float(text[:-1]) * 60
+    return float(text.rstrip("s"))
+
+
+async def probe_entries(entries, check, probe, concurrency, deadline=None, headers=False):
+    """
+    Probe playlist entries and yield (index, entry, Probe) as verdicts come in.
+    Fresh cached verdicts come first, URLs backing off after repeated failures
+    keep their last (dead) verdict without a probe, and the rest are probed
+    likely-alive first according to their health history. `probe(session,
+    url)` runs the check, or `probe(session, url, headers)` with `headers=True`
+    to send each entry's VLC headers; `index` is the entry's position in the
+    input. Identical targets are probed once.
+
+    With `deadline` (seconds), probes are ordered by expected value instead,
+    their timeouts follow the remaining budget, and every entry left unprobed
+    when it runs out keeps its last-known verdict (kept when never seen), so
+    the generator is done in time for the playlist to be written. A probe cut
+    short by the budget is no failure: the history only learns it was slow.
+    """
+    entries = list(entries)
+    budget = Deadline(deadline) if deadline else None
+    deduper = ProbeDeduper()
+    unprobed = 0
+
+    def target(entry):
+        return entry.url, entry.request_headers() if headers else None
+
+    with ProbeCache(check) as cache, HealthHistory(cache.db, check) as history:
+        todo = []
+        for i, entry in enumerate(entries):
+            result = cache.get(*target(entry))
+            if result is None and history.backing_off(*target(entry)):
+                result = Probe(False)
+            if result is None:
+                todo.append(i)
+            else:
+                yield i, entry, result
+        rank = history.expected_value if budget else history.priority
+        todo.sort(key=lambda i: rank(*target(entries[i])))
+        queued = len(todo)
+
+        async with probe_session(concurrency) as session:
+
+            async def resolve(url, request_headers):
+                """(Probe, probed); without a fresh verdict, the last-known one."""
+                args = (session, url, request_headers) if headers else (session, url)
+                if budget is None:
+                    result = await probe(*args)
+                else:
+                    timeout = budget.probe_timeout(queued, concurrency)
+                    if timeout is None:
+                        return history.last_verdict(url, request_headers), False
+                    try:
+                        result = await asyncio.wait_for(probe(*args), timeout)
+                    except asyncio.TimeoutError:
+                        # cut short by the budget, not by the stream: the entry keeps
+                        # its last-known verdict and never backs off for it, but it
+                        # ranks lower next run since it took at least `timeout`
+                        history.record_cut(url, request_headers, timeout)
+                        return history.last_verdict(url, request_headers), False
+                cache.put(url, request_headers, result)
+                history.record(url, request_headers, result)
+                return result, True
+
+            async def run(i):
+                nonlocal queued, unprobed
+                url, request_headers = target(entries[i])
+                result, probed = await deduper.run(
+                    url, request_headers, lambda: resolve(url, request_headers)
+                )
+                queued -= 1
+                if not probed:
+                    unprobed += 1
+                return i, entries[i], result
+
+            # with a deadline every task starts probing at once, so its timeout is its own
+            window = concurrency if budget else concurrency * WINDOW_FACTOR
+            async for item in as_completed_bounded((run(i) for i in todo), window):
+                yield item
+
+        cache.report()
+        history.report()
+        deduper.report()
+        if budget:
+            print(f"⏱️ Deadline: {unprobed} entries out of time, kept their last-known verdict")
+
+
+def probe_session(concurrency, per_host=PER_HOST_LIMIT, timeout=PROBE_TIMEOUT, **kwargs):
+    """One pooled session for a whole run: `concurrency` sockets, `per_host` per host."""
+    return httpclient.async_session(limit=concurrency, per_host=per_host, timeout=timeout, **kwargs)
+
+
+async def head_then_get(session, url, accept, headers=None):
+    """
+    HEAD the URL and fall back to a GET when HEAD fails or is not accepted.
+    `accept(status, content_type)` decides the verdict. The GET body is never
+    read: the response is released as soon as its headers are in.
+    """
+    result = Probe(False)
+    for method in ("HEAD", "GET"):
+        start = time.perf_counter()
+        try:
+            async with session.request(method, url, headers=headers, allow_redirects=True) as r:
+                content_type = r.headers.get("Content-Type", "").split(";")[0]
+                result = Probe(
+                    accept(r.status, content_type),
+                    r.status,
+                    content_type,
+                    round(time.perf_counter() - start, 3),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            continue
+        if result.verdict:
+            break
+    return result
+
+
+class ProbeDeduper:
+    """
+    Collapses probe targets on (URL, effective headers): the first entry
+    for a target runs the probe, every later one gets the same verdict.
+    Only the verdicts of finished probes are kept, the `max_verdicts` most
+    recently used, so memory stays bounded on a streamed playlist.
+    """
+
+    def __init__(self, max_verdicts=MAX_VERDICTS):
+        self.max_verdicts = max_verdicts
+        self._verdicts = OrderedDict()  # key -> verdict of a finished probe
+        self._pending = {}              # key -> task still probing
+        self.entries = 0
+        self.probes = 0
+
+    def _key(self, url, headers):
+        return url, headers_key(headers)
+
+    def _remember(self, key, verdict):
+        self._verdicts[key] = verdict
+        if len(self._verdicts) > self.max_verdicts:
+            self._verdicts.popitem(last=False)
+
+    def _settle(self, key, task):
+        del self._pending[key]
+        if not task.cancelled() and task.exception() is None:
+            self._remember(key, task.result())
+
+    async def run(self, url, headers, probe):
+        """Await `probe()` once per target; concurrent duplicates share the task."""
+        self.entries += 1
+        key = self._key(url, headers)
+        if key in self._verdicts:
+            self._verdicts.move_to_end(key)
+            return self._verdicts[key]
+        task = self._pending.get(key)
+        if task is None:
+            self.probes += 1
+            task = self._pending[key] = asyncio.ensure_future(probe())
+            task.add_done_callback(lambda done: self._settle(key, done))
+        return await asyncio.shield(task)
+
+    def run_sync(self, url, headers, probe):
+        self.entries += 1
+        key = self._key(url, headers)
+        if key in self._verdicts:
+            self._verdicts.move_to_end(key)
+            return self._verdicts[key]
+        self.probes += 1
+        verdict = probe()
+        self._remember(key, verdict)
+        return verdict
+
+    def report(self):
+        saved = self.entries - self.probes
+        rate = 100 * saved / self.entries if self.entries else 0.0
+        print(f"🧬 Duplicate targets: {saved}/{self.entries} entries ({rate:.1f}%), "
+              f"{self.probes} unique probes, {saved} probes saved")
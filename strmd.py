@@ -1,9 +1,11 @@
+import argparse
 import asyncio
-import re
-import requests
 import logging
 from datetime import datetime
-from playwright.async_api import async_playwright
+
+import httpclient
+from embedcache import EmbedCache
+from matchstreams import WORKERS, MatchStreams, strip_non_ascii
 
 logging.basicConfig(
     filename="scrape.log",
@@ -55,15 +57,6 @@ TV_IDS = {
 
 total_matches = 0
 total_embeds = 0
-total_streams = 0
-total_failures = 0
-
-
-def strip_non_ascii(text: str) -> str:
-    """Remove emojis and non-ASCII characters."""
-    if not text:
-        return ""
-    return re.sub(r"[^\x00-\x7F]+", "", text)
 
 
 def get_all_matches():
@@ -72,7 +65,7 @@ def get_all_matches():
     for ep in endpoints:
         try:
             log.info(f"📡 Fetching {ep} matches...")
-            res = requests.get(f"https://streami.su/api/matches/{ep}", timeout=10)
+            res = httpclient.get(f"https://streami.su/api/matches/{ep}", timeout=10)
             res.raise_for_status()
             data = res.json()
             log.info(f"✅ {ep}: {len(data)} matches")
@@ -88,7 +81,7 @@ def get_embed_urls_from_api(source):
         s_name, s_id = source.get("source"), source.get("id")
         if not s_name or not s_id:
             return []
-        res = requests.get(f"https://streami.su/api/stream/{s_name}/{s_id}", timeout=6)
+        res = httpclient.get(f"https://streami.su/api/stream/{s_name}/{s_id}", timeout=6)
         res.raise_for_status()
         data = res.json()
         return [d.get("embedUrl") for d in data if d.get("embedUrl")]
@@ -96,90 +89,12 @@ def get_embed_urls_from_api(source):
         return []
 
 
-async def extract_m3u8(page, embed_url):
-    global total_failures
-    found = None
-    try:
-        async def on_request(request):
-            nonlocal found
-            if ".m3u8" in request.url and not found:
-                if "prd.jwpltx.com" in request.url:
-                    return
-                found = request.url
-                log.info(f"  ⚡ Stream: {found}")
-
-        page.on("request", on_request)
-        await page.goto(embed_url, wait_until="domcontentloaded", timeout=5000)
-        await page.bring_to_front()
-        selectors = [
-            "div.jw-icon-display[role='button']",
-            ".jw-icon-playback",
-            ".vjs-big-play-button",
-            ".plyr__control",
-            "div[class*='play']",
-            "div[role='button']",
-            "button",
-            "canvas"
-        ]
-        for sel in selectors:
-            try:
-                el = await page.query_selector(sel)
-                if el:
-                    await el.click(timeout=300)
-                    break
-            except:
-                continue
-
-        try:
-            await page.mouse.click(200, 200)
-            log.info("  👆 First click triggered ad")
-            pages_before = page.context.pages
-            new_tab = None
-            for _ in range(12):
-                pages_now = page.context.pages
-                if len(pages_now) > len(pages_before):
-                    new_tab = [p for p in pages_now if p not in pages_before][0]
-                    break
-                await asyncio.sleep(0.25)
-            if new_tab:
-                try:
-                    await asyncio.sleep(0.5)
-                    url = (new_tab.url or "").lower()
-                    log.info(f"  🚫 Forcing close on ad tab: {url if url else '(blank/new)'}")
-                    await new_tab.close()
-                except Exception:
-                    log.info("  ⚠️ Ad tab close failed")
-            await asyncio.sleep(1)
-            await page.mouse.click(200, 200)
-            log.info("  ▶️ Second click started player")
-        except Exception as e:
-            log.warning(f"⚠️ Momentum click sequence failed: {e}")
-
-        for _ in range(4):
-            if found:
-                break
-            await asyncio.sleep(0.25)
-
-        if not found:
-            html = await page.content()
-            matches = re.findall(r'https?://[^\s\"\'<>]+\.m3u8(?:\?[^\"\'<>]*)?', html)
-            if matches:
-                found = matches[0]
-                log.info(f"  🕵️ Fallback: {found}")
-
-        return found
-    except Exception as e:
-        total_failures += 1
-        log.warning(f"⚠️ {embed_url} failed: {e}")
-        return None
-
-
 def validate_logo(url, category):
     cat = (category or "other").lower().replace("-", " ").strip()
     fallback = FALLBACK_LOGOS.get(cat, FALLBACK_LOGOS["other"])
     if url:
         try:
-            res = requests.head(url, timeout=2)
+            res = httpclient.head(url, timeout=2)
             if res.status_code in (200, 302):
                 return url
         except Exception:
@@ -201,83 +116,62 @@ def build_logo_url(match):
     return validate_logo(None, cat), cat
 
 
-async def process_match(index, match, total, ctx):
-    global total_embeds, total_streams
-    title = strip_non_ascii(match.get("title", "Unknown Match"))
-    log.info(f"\n🎯 [{index}/{total}] {title}")
-    sources = match.get("sources", [])
-    match_embeds = 0
-    page = await ctx.new_page()
-    for s in sources:
-        embed_urls = get_embed_urls_from_api(s)
-        total_embeds += len(embed_urls)
-        match_embeds += len(embed_urls)
-        if not embed_urls:
-            continue
-        log.info(f"  ↳ {len(embed_urls)} embed URLs")
-        for i, embed in enumerate(embed_urls, start=1):
-            log.info(f"     • ({i}/{len(embed_urls)}) {embed}")
-            m3u8 = await extract_m3u8(page, embed)
-            if m3u8:
-                total_streams += 1
-                log.info(f"     ✅ Stream OK for {title}")
-                await page.close()
-                return match, m3u8
-    await page.close()
-    log.info(f"     ❌ No working streams ({match_embeds} embeds)")
-    return match, None
+def get_match_embeds(match):
+    """Embed URLs of every source of a match, in source order."""
+    return [e for s in match.get("sources", []) for e in get_embed_urls_from_api(s)]
 
 
-async def generate_playlist():
-    global total_matches
+async def generate_playlist(streams):
+    global total_matches, total_embeds
     matches = get_all_matches()
     total_matches = len(matches)
     if not matches:
         log.warning("❌ No matches found.")
         return "#EXTM3U\n"
 
-    content = ["#EXTM3U"]
-    success = 0
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, channel="chrome-beta")
-        ctx = await browser.new_context(extra_http_headers=CUSTOM_HEADERS)
-        sem = asyncio.Semaphore(2)
-
-        async def worker(idx, m):
-            async with sem:
-                return await process_match(idx, m, total_matches, ctx)
+    # blocking HTTP: run the embed API calls in threads, all matches at once
+    embeds = await asyncio.gather(*(asyncio.to_thread(get_match_embeds, m) for m in matches))
+    total_embeds = sum(len(e) for e in embeds)
 
-        for i, m in enumerate(matches, 1):
-            match, url = await worker(i, m)
-            if not url:
-                continue
+    urls = await streams.resolve(matches, embeds)
 
-            logo, raw_cat = build_logo_url(match)
-            base_cat = (raw_cat or "other").strip().replace("-", " ").lower()
-            display_cat = strip_non_ascii(base_cat.title())
-            tv_id = TV_IDS.get(base_cat, TV_IDS["other"])
-            title = strip_non_ascii(match.get("title", "Untitled"))
-
-            content.append(
-                f'#EXTINF:-1 tvg-id="{tv_id}" tvg-name="{title}" '
-                f'tvg-logo="{logo or FALLBACK_LOGOS["other"]}" group-title="Streamed",{title}'
-            )
-            content.append(f'#EXTVLCOPT:http-origin={CUSTOM_HEADERS["Origin"]}')
-            content.append(f'#EXTVLCOPT:http-referrer={CUSTOM_HEADERS["Referer"]}')
-            content.append(f'#EXTVLCOPT:user-agent={CUSTOM_HEADERS["User-Agent"]}')
-            content.append(url)
-            success += 1
-
-        await browser.close()
+    content = ["#EXTM3U"]
+    success = 0
+    resolved = [(m, url) for m, url in zip(matches, urls) if url]
+    logos = await asyncio.gather(*(asyncio.to_thread(build_logo_url, m) for m, _ in resolved))
+
+    # streams are in match order, whatever order they were resolved in
+    for (match, url), (logo, raw_cat) in zip(resolved, logos):
+        base_cat = (raw_cat or "other").strip().replace("-", " ").lower()
+        display_cat = strip_non_ascii(base_cat.title())
+        tv_id = TV_IDS.get(base_cat, TV_IDS["other"])
+        title = strip_non_ascii(match.get("title", "Untitled"))
+
+        content.append(
+            f'#EXTINF:-1 tvg-id="{tv_id}" tvg-name="{title}" '
+            f'tvg-logo="{logo or FALLBACK_LOGOS["other"]}" group-title="Streamed",{title}'
+        )
+        content.append(f'#EXTVLCOPT:http-origin={CUSTOM_HEADERS["Origin"]}')
+        content.append(f'#EXTVLCOPT:http-referrer={CUSTOM_HEADERS["Referer"]}')
+        content.append(f'#EXTVLCOPT:user-agent={CUSTOM_HEADERS["User-Agent"]}')
+        content.append(url)
+        success += 1
 
     log.info(f"\n🎉 {success} working streams written to playlist.")
     return "\n".join(content)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"matches processed in parallel (default {WORKERS})")
+    args = parser.parse_args()
+
     start = datetime.now()
     log.info("🚀 Starting StreamedSU scrape run (LIVE only)...")
-    playlist = asyncio.run(generate_playlist())
+    with EmbedCache() as cache:
+        streams = MatchStreams(CUSTOM_HEADERS, cache, args.workers)
+        playlist = asyncio.run(generate_playlist(streams))
     with open("strmd.m3u8", "w", encoding="utf-8") as f:
         f.write(playlist)
     end = datetime.now()
@@ -286,6 +180,7 @@ if __name__ == "__main__":
     log.info(f"🕓 Duration: {duration:.2f} sec")
     log.info(f"📺 Matches:  {total_matches}")
     log.info(f"🔗 Embeds:   {total_embeds}")
-    log.info(f"✅ Streams:  {total_streams}")
-    log.info(f"❌ Failures: {total_failures}")
+    log.info(f"✅ Streams:  {streams.streams}")
+    log.info(f"❌ Failures: {streams.failures}")
+    log.info(f"💾 Cache:    {cache.summary()}")
     log.info("------------------------------------------------")
@@ -3,6 +3,10 @@ import aiohttp
 import sys
 from pathlib import Path
 
+import httpclient
+from m3u import SortedPlaylistWriter, parse_file
+from streamfilter import WINDOW_FACTOR, ProbeDeduper, as_completed_bounded
+
 # ---------- CONFIG ----------
 TIMEOUT = aiohttp.ClientTimeout(total=12)
 MAX_CONCURRENCY = 80
@@ -31,81 +35,47 @@ async def is_stream_fast(session, url, headers, depth=0):
     return True
 
 # ---------- WORKER ----------
-async def check_stream(semaphore, session, entry):
-    extinf, vlcopts, kodiprops, url = entry
-    headers = {}
-
-    for opt in vlcopts:
-        key, _, value = opt[len("#EXTVLCOPT:"):].partition("=")
-        k = key.lower()
-        if k == "http-referrer":
-            headers["Referer"] = value
-        elif k == "http-origin":
-            headers["Origin"] = value
-        elif k == "http-user-agent":
-            headers["User-Agent"] = value
-
-    async with semaphore:
-        fast = await is_stream_fast(session, url, headers)
-
-    title = ""
-    if extinf:
-        parts = extinf[0].split(",", 1)
-        if len(parts) == 2:
-            title = parts[1].strip()
-
-    return fast, title, extinf, vlcopts, kodiprops, url
+async def check_stream(semaphore, session, deduper, entry):
+    headers = entry.request_headers()
+
+    async def probe():
+        async with semaphore:
+            return await is_stream_fast(session, entry.url, headers)
+
+    fast = await deduper.run(entry.url, {**DEFAULT_HEADERS, **headers}, probe)
+
+    return fast, entry.title, entry
 
 # ---------- MAIN ----------
 async def filter_all_streams(input_path, output_path):
-    lines = Path(input_path).read_text(encoding="utf-8", errors="ignore").splitlines()
-
-    entries = []
-    extinf, vlcopts, kodiprops = [], [], []
-
-    for line in lines:
-        if line.startswith("#EXTINF"):
-            extinf = [line]
-        elif line.startswith("#EXTVLCOPT"):
-            vlcopts.append(line)
-        elif line.startswith("#KODIPROP"):
-            kodiprops.append(line)
-        elif line.startswith(("http://", "https://")):
-            entries.append((extinf.copy(), vlcopts.copy(), kodiprops.copy(), line.strip()))
-            extinf.clear()
-            vlcopts.clear()
-            kodiprops.clear()
-
-    connector = aiohttp.TCPConnector(limit_per_host=15, ssl=False)
     semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    deduper = ProbeDeduper()
 
-    async with aiohttp.ClientSession(
-        timeout=TIMEOUT,
-        connector=connector,
-        headers=DEFAULT_HEADERS,
+    async with httpclient.async_session(
+        per_host=15, ssl=False, timeout=TIMEOUT, headers=DEFAULT_HEADERS
     ) as session:
 
-        tasks = [check_stream(semaphore, session, e) for e in entries]
-        all_entries = []
-
-        for coro in asyncio.as_completed(tasks):
-            fast, title, extinf, vlcopts, kodiprops, url = await coro
-            if fast:
-                print(f"✓ ACCEPTED: {title or url}")
-                all_entries.append((title.lower(), extinf, vlcopts, kodiprops, url))
-            else:
-                print(f"✗ BLOCKED DOMAIN: {url}")
-
-    all_entries.sort(key=lambda x: x[0])
-
-    out = ["#EXTM3U"]
-    for _, extinf, vlcopts, kodiprops, url in all_entries:
-        out.extend(extinf)
-        out.extend(vlcopts)
-        out.extend(kodiprops)
-        out.append(url)
+        tasks = (
+            check_stream(semaphore, session, deduper, e)
+            for e in parse_file(input_path)
+            if e.url.startswith(("http://", "https://"))
+        )
+
+        # Accepted entries hit <output>.partial as soon as they are probed;
+        # the title-sorted playlist is produced when the writer closes.
+        with SortedPlaylistWriter(output_path) as out:
+            async for fast, title, entry in as_completed_bounded(
+                tasks, MAX_CONCURRENCY * WINDOW_FACTOR
+            ):
+                if fast:
+                    print(f"✓ ACCEPTED: {title or entry.url}")
+                    entry.headers = tuple(entry.vlcopts() + entry.kodiprops())
+                    out.add(entry)
+                else:
+                    print(f"✗ BLOCKED DOMAIN: {entry.url}")
+
+        deduper.report()
 
-    Path(output_path).write_text("\n".join(out) + "\n", encoding="utf-8")
     print(f"\nSaved playlist to: {output_path}")
 
 # ---------- CLI ----------
@@ -0,0 +1,16 @@
+from resourceblock import ResourceBlocker
+
+
+def test_playlist_loaded_as_media_gets_through():
+    blocker = ResourceBlocker()
+    page = object()
+    assert blocker.reason("https://cdn.example/live/index.m3u8?token=1", "media", page) is None
+    # the rest of the media is still blocked, and segments after the playlist
+    assert blocker.reason("https://cdn.example/intro.mp3", "media", page) == "media"
+    assert blocker.reason("https://cdn.example/live/seg1.ts", "xhr", page) == "segment"
+
+
+def test_ad_hosts_and_types_still_blocked():
+    blocker = ResourceBlocker()
+    assert blocker.reason("https://ads.doubleclick.net/x.js", "script") == "ad host"
+    assert blocker.reason("https://site.example/logo.png", "image") == "image"
@@ -0,0 +1,36 @@
+import asyncio
+import sqlite3
+
+import streamfilter
+from health import FAIL_THRESHOLD
+from m3u import Entry
+from probecache import Probe
+
+
+async def never_answers(session, url):
+    await asyncio.sleep(30)
+    return Probe(True)
+
+
+def run_once(deadline):
+    entries = [Entry("#EXTINF:-1,Slow", (), "http://slow.example/live.m3u8")]
+
+    async def collect():
+        return [result async for _, _, result in
+                streamfilter.probe_entries(entries, "test", never_answers, 1, deadline=deadline)]
+
+    return asyncio.run(collect())
+
+
+def test_budget_cuts_never_back_off(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(streamfilter, "MIN_PROBE_SECONDS", 0.05)
+    monkeypatch.setattr(streamfilter.Deadline.__init__, "__defaults__", (0,))
+
+    for _ in range(FAIL_THRESHOLD):
+        assert run_once(0.2) == [Probe(True)]
+
+    fails, next_probe, probes = sqlite3.connect("probe_cache.sqlite3").execute(
+        "SELECT fails, next_probe, probes FROM health"
+    ).fetchone()
+    assert (fails, next_probe, probes) == (0, 0.0, FAIL_THRESHOLD)
@@ -0,0 +1,105 @@
+import asyncio
+import html
+import re
+from collections import Counter, defaultdict
+from urllib.parse import urljoin, urlsplit
+
+import httpclient
+
+# ---------- CONFIG ----------
+M3U8_RE = re.compile(r'https?://[^\s"\'<>`\\]+\.m3u8(?:\?[^\s"\'<>`\\]*)?')
+IFRAME_RE = re.compile(r'<iframe[^>]+src\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+MAX_IFRAME_DEPTH = 2        # embed -> iframe -> iframe
+MAX_IFRAMES = 4             # per page, the rest is usually ads
+FETCH_TIMEOUT = (5, 8)
+IGNORED = ("prd.jwpltx.com",)
+
+# tier names, cheapest first
+HTML, IFRAME, BROWSER, UNRESOLVED = "html", "iframe", "browser", "unresolved"
+TIERS = (HTML, IFRAME, BROWSER, UNRESOLVED)
+
+
+def provider_of(url):
+    return (urlsplit(url).hostname or "").lower()
+
+
+class TieredResolver:
+    """
+    Finds the m3u8 behind an embed URL as cheaply as possible:
+
+      html     plain GET of the embed page, m3u8 URLs matched in the HTML
+      iframe   the same over nested <iframe src> pages, Referer set to the parent
+      browser  left to the caller (Playwright) when both found nothing usable;
+               it reports the outcome back with record()
+
+    Candidates from the static tiers must pass `check(m3u8)` before they
+    are used, so a stale URL in a page template never wins. Counts which
+    tier resolved each embed, per provider (embed host).
+    """
+
+    def __init__(self, headers=None, ignore=IGNORED):
+        self.headers = headers or {}
+        self.ignore = ignore
+        self.stats = defaultdict(Counter)   # provider -> tier -> embeds
+
+    def _fetch(self, url, referer=None):
+        headers = dict(self.headers)
+        if referer:
+            headers["Referer"] = referer
+        try:
+            r = httpclient.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+            r.raise_for_status()
+            return r.text
+        except httpclient.RequestException:
+            return None
+
+    def _m3u8s(self, text):
+        found = []
+        for url in M3U8_RE.findall(html.unescape(text).replace("\\/", "/")):
+            if url not in found and not any(i in url for i in self.ignore):
+                found.append(url)
+        return found
+
+    def candidates(self, embed_url):
+        """(tier, m3u8) pairs from the static tiers, in the order worth trying them."""
+        page = self._fetch(embed_url)
+        if page is None:
+            return []
+        found = [(HTML, url) for url in self._m3u8s(page)]
+
+        frontier, seen = [(embed_url, page)], {embed_url}
+        for _ in range(MAX_IFRAME_DEPTH):
+            nested = []
+            for parent, text in frontier:
+                for src in IFRAME_RE.findall(text)[:MAX_IFRAMES]:
+                    src = urljoin(parent, html.unescape(src).strip())
+                    if not src.startswith(("http://", "https://")) or src in seen:
+                        continue
+                    seen.add(src)
+                    child = self._fetch(src, referer=parent)
+                    if child is not None:
+                        found += [(IFRAME, url) for url in self._m3u8s(child)]
+                        nested.append((src, child))
+            frontier = nested
+        return found
+
+    async def resolve_static(self, embed_url, check):
+        """First static candidate `await check(m3u8)` accepts, or None."""
+        for tier, m3u8 in await asyncio.to_thread(self.candidates, embed_url):
+            if await check(m3u8):
+                self.record(embed_url, tier)
+                return m3u8
+        return None
+
+    def record(self, embed_url, tier):
+        self.stats[provider_of(embed_url)][tier] += 1
+
+    def summary(self):
+        """One line per provider: how many embeds each tier resolved."""
+        totals = Counter()
+        lines = []
+        for provider, tiers in sorted(self.stats.items(), key=lambda kv: -sum(kv[1].values())):
+            totals.update(tiers)
+            lines.append(f"   {provider}: " + ", ".join(f"{t} {tiers[t]}" for t in TIERS if tiers[t]))
+        head = ", ".join(f"{t} {totals[t]}" for t in TIERS if totals[t]) or "nothing resolved"
+        return "\n".join([f"🪜 Resolver tiers: {head}"] + lines)
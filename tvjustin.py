@@ -8,6 +8,10 @@ from urllib.parse import urlparse, parse_qs, urljoin
 
 from playwright.sync_api import sync_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 
+from browserpool import SyncContextPool
+
+from resourceblock import ResourceBlocker
+
 
 
 # --- DEĞİŞİKLİK: Justin TV ana domain'i ---
@@ -352,15 +356,18 @@ def main():
 
         browser = p.chromium.launch(headless=True)
 
-        context = browser.new_context(user_agent=USER_AGENT)
+        blocker = ResourceBlocker()
 
-        page = context.new_page()
+        # one warm page, reset between steps and replaced as it ages
+        pool = SyncContextPool(browser, setup=blocker.attach_sync, user_agent=USER_AGENT)
 
 
 
         # 1. Adım: Varsayılan kanaldan event URL'sini al (Base URL için)
 
-        default_event_url, default_stream_id = scrape_default_channel_info(page)
+        with pool.page() as page:
+
+            default_event_url, default_stream_id = scrape_default_channel_info(page)
 
         if not default_event_url:
 
@@ -374,7 +381,9 @@ def main():
 
         # 2. Adım: event URL'den M3U8 Base URL'ini çıkar
 
-        base_m3u8_url = extract_base_m3u8_url(page, default_event_url)
+        with pool.page() as page:
+
+            base_m3u8_url = extract_base_m3u8_url(page, default_event_url)
 
         if not base_m3u8_url:
 
@@ -388,7 +397,9 @@ def main():
 
         # 3. Adım: Ana sayfadaki tüm kanalları kazı
 
-        channels = scrape_all_channels(page)
+        with pool.page() as page:
+
+            channels = scrape_all_channels(page)
 
         if not channels:
 
@@ -460,6 +471,10 @@ def main():
 
         browser.close()
 
+        print(blocker.summary())
+
+        print(pool.summary())
+
 
 
         if created > 0:
@@ -1,8 +1,9 @@
-import requests
-import re
 import time
 from datetime import datetime
 
+import httpclient
+from m3u import iter_entries
+
 playlist_urls = [
     "http://tvpass.org/playlist/m3u",
 ] 
@@ -15,7 +16,7 @@ def fetch_playlist(url, retries=3, timeout=30):
     for attempt in range(1, retries + 1):
         try:
             print(f"Attempting to fetch {url} (try {attempt})...")
-            res = requests.get(url, timeout=timeout, headers=headers)
+            res = httpclient.get(url, timeout=timeout, headers=headers)
             res.raise_for_status()
             print(f"✅ Successfully fetched {url}")
             return res.text.strip().splitlines()
@@ -27,29 +28,16 @@ def fetch_playlist(url, retries=3, timeout=30):
 
 def parse_playlist(lines, source_url="Unknown"):
     parsed_channels = []
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        if line.startswith("#EXTINF:"):
-            extinf_line = line
-            channel_headers = []
-            i += 1
-            while i < len(lines) and lines[i].strip().startswith("#") and not lines[i].strip().startswith("#EXTINF:"):
-                channel_headers.append(lines[i].strip())
-                i += 1
-            while i < len(lines) and not lines[i].strip():
-                i += 1
-            if i < len(lines):
-                url_line = lines[i].strip()
-                if url_line and not url_line.startswith("#") and url_line != "*":
-                    parsed_channels.append((extinf_line, tuple(channel_headers), url_line))
-                else:
-                    print(f"⚠️ Skipped entry in {source_url}. Invalid URL '{url_line}'.")
-                i += 1
-            else:
-                i += 1
-        else:
-            i += 1
+    for entry in iter_entries(lines):
+        if not entry.extinf:
+            continue
+        if entry.url == "*":
+            print(f"⚠️ Skipped entry in {source_url}. Invalid URL '{entry.url}'.")
+            continue
+        # only the tags after #EXTINF belong to the channel; the ones before it
+        # (#EXTGRP markers, ...) are regenerated on write
+        entry.headers = entry.headers[entry.lead:]
+        parsed_channels.append(entry)
     print(f"✅ Parsed {len(parsed_channels)} valid channels from {source_url}.")
     return parsed_channels
 
@@ -57,23 +45,15 @@ def write_merged_playlist(all_channels):
     lines = [f'#EXTM3U url-tvg="{EPG_URL}"', ""]
     sortable_channels = []
 
-    for extinf, headers, url in all_channels:
-        group_match = re.search(r'group-title="([^"]+)"', extinf)
-        group = group_match.group(1) if group_match else "Other"
-        try:
-            title = extinf.rsplit(',', 1)[1].strip()
-        except IndexError:
-            title = ""
-        sortable_channels.append((group.lower(), title.lower(), extinf, headers, url))
+    for entry in all_channels:
+        group = entry.get("group-title") or "Other"
+        sortable_channels.append((group.lower(), entry.title.lower(), entry.extinf, entry.headers, entry.url, group))
 
     sorted_channels = sorted(sortable_channels)
     current_group = None
     total_channels_written = 0
 
-    for group_lower, title_lower, extinf, headers, url in sorted_channels:
-        group_match = re.search(r'group-title="([^"]+)"', extinf)
-        actual_group_name = group_match.group(1) if group_match else "Other"
-
+    for group_lower, title_lower, extinf, headers, url, actual_group_name in sorted_channels:
         if actual_group_name != current_group:
             if current_group is not None:
                 lines.append("")
@@ -81,8 +61,7 @@ def write_merged_playlist(all_channels):
             current_group = actual_group_name
 
         lines.append(extinf)
-        for hdr_line in headers:
-            lines.append(hdr_line)
+        lines.extend(headers)
         lines.append(url)
         total_channels_written += 1
 
@@ -1,10 +1,15 @@
 import asyncio
 import aiohttp
 import sys
-import time
 import re
 from pathlib import Path
-from urllib.parse import urljoin
+
+import httpclient
+from hlsprobe import HLSProber
+from hostbreaker import HostBreaker
+from m3u import SortedPlaylistWriter, parse_file
+from probecache import Probe, ProbeCache
+from streamfilter import WINDOW_FACTOR, ProbeDeduper, as_completed_bounded
 
 # ---------- CONFIG (ADJUSTED & REALISTIC) ----------
 TIMEOUT = aiohttp.ClientTimeout(total=12)
@@ -15,6 +20,8 @@ MAX_TTFB = 4.0              # allow CDN warmup
 SAMPLE_BYTES = 384_000      # read up to 384 KB
 WARMUP_BYTES = 32_000       # ignore first 32 KB for speed
 RETRIES = 2                 # retry slow streams once
+SAMPLE_SEGMENTS = 1         # 2 = split the sample over two segments fetched in parallel
+CONFIDENCE = 0.95           # stop sampling once fast/slow is this certain (None = full sample)
 
 DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
 
@@ -23,187 +30,118 @@ BLOCKED_DOMAINS = {
     "ssai2-ads.api.leiniao.com",
 }
 
-# ---------- SPEED TEST (WARMED & REALISTIC) ----------
-async def stream_is_fast(session, url, headers):
-    for attempt in range(RETRIES):
-        try:
-            start = time.perf_counter()
-            async with session.get(url, headers=headers) as r:
-                if r.status >= 400:
-                    return False
-
-                first_byte_time = None
-                speed_start_time = None
-                total = 0
-                measured = 0
-
-                async for chunk in r.content.iter_chunked(8192):
-                    now = time.perf_counter()
-
-                    if first_byte_time is None:
-                        first_byte_time = now
-
-                    total += len(chunk)
-
-                    if total < WARMUP_BYTES:
-                        continue
-
-                    if speed_start_time is None:
-                        speed_start_time = now
-
-                    measured += len(chunk)
-
-                    if measured >= SAMPLE_BYTES:
-                        break
-
-                if not speed_start_time:
-                    continue
-
-                ttfb = first_byte_time - start
-                duration = max(now - speed_start_time, 0.001)
-                speed_kbps = (measured / 1024) / duration
-
-                if ttfb <= MAX_TTFB and speed_kbps >= MIN_SPEED_KBPS:
-                    return True
-
-        except Exception:
-            pass
-
-        await asyncio.sleep(0.2)
-
-    return False
-
 # ---------- STREAM VALIDATION ----------
-async def is_stream_fast(session, url, headers, depth=0):
-    if depth > MAX_HLS_DEPTH:
-        return False
-
-    for d in BLOCKED_DOMAINS:
-        if d in url:
-            return False
-
-    if ".m3u8" not in url:
-        return await stream_is_fast(session, url, headers)
-
-    try:
-        async with session.get(url, headers=headers) as r:
-            if r.status >= 400:
-                return False
-            text = await r.text()
-    except Exception:
-        return False
-
-    if not text.startswith("#EXTM3U"):
-        return False
-
-    lines = text.splitlines()
-
-    # Master playlist
-    for i, line in enumerate(lines):
-        if line.startswith("#EXT-X-STREAM-INF") and i + 1 < len(lines):
-            variant = lines[i + 1].strip()
-            if not variant.startswith("#"):
-                return await is_stream_fast(
-                    session,
-                    urljoin(url, variant),
-                    headers,
-                    depth + 1
-                )
-            return False
-
-    # Media playlist → first segment
-    segments = [l for l in lines if l and not l.startswith("#")]
-    if not segments:
-        return False
-
-    segment_url = urljoin(url, segments[0])
-    return await stream_is_fast(session, segment_url, headers)
+def is_blocked(url):
+    return any(d in url for d in BLOCKED_DOMAINS)
+
+def is_fast(ttfb, kbps):
+    return ttfb <= MAX_TTFB and kbps >= MIN_SPEED_KBPS
+
+# verdict -> [probes, bytes read, seconds]
+VERDICT_COST = {"fast": [0, 0, 0.0], "slow": [0, 0, 0.0]}
+
+async def is_stream_fast(prober, url, headers):
+    """Master → first variant → first segment, warmed speed test on the segment."""
+    result = await prober.probe(url, headers)
+    cost = VERDICT_COST["fast" if result.ok else "slow"]
+    cost[0] += 1
+    cost[1] += result.bytes_read
+    cost[2] += result.seconds
+    return Probe(result.ok, result.status, result.content_type, result.segment_ttfb, result.kbps)
+
+def report_cost():
+    for verdict, (count, nbytes, seconds) in VERDICT_COST.items():
+        if count:
+            print(f"📊 {verdict.upper()}: {count} probes, avg {nbytes / count / 1024:.0f} KB "
+                  f"and {seconds / count:.2f}s per verdict")
 
 # ---------- WORKER ----------
-async def check_stream(semaphore, session, entry):
-    extinf, vlcopts, url = entry
-    headers = {}
-
-    for opt in vlcopts:
-        key, _, value = opt[len("#EXTVLCOPT:"):].partition("=")
-        k = key.lower()
-        if k == "http-referrer":
-            headers["Referer"] = value
-        elif k == "http-origin":
-            headers["Origin"] = value
-        elif k == "http-user-agent":
-            headers["User-Agent"] = value
+async def resolve(semaphore, prober, cache, breaker, url, headers, effective):
+    result = cache.get(url, effective)
+    if result is not None:
+        return result
 
     async with semaphore:
-        fast = await is_stream_fast(session, url, headers)
-
-    title = ""
-    if extinf:
-        parts = extinf[0].split(",", 1)
-        if len(parts) == 2:
-            # remove leading number from title
-            new_title = re.sub(r'^\d+\s*', '', parts[1])
-            title = new_title.strip()
-        else:
-            title = ""
-
-    return fast, title, extinf, vlcopts, url
+        # checked once a slot is free, so queued probes see a fresh trip
+        if breaker.allow(url):
+            result = await is_stream_fast(prober, url, headers)
+    if result is None:
+        # host tripped: fail fast, and keep it out of the cache
+        return Probe(False)
+
+    # no HTTP status at all means a timeout or connection error
+    if result.status is None and not is_blocked(url):
+        breaker.failure(url)
+    else:
+        breaker.success(url)
+    cache.put(url, effective, result)
+    return result
+
+async def check_stream(semaphore, prober, cache, breaker, deduper, entry):
+    headers = entry.request_headers()
+    effective = {**DEFAULT_HEADERS, **headers}
+
+    result = await deduper.run(
+        entry.url, effective,
+        lambda: resolve(semaphore, prober, cache, breaker, entry.url, headers, effective),
+    )
+    fast = result.verdict
+
+    # remove leading number from title
+    title = re.sub(r'^\d+\s*', '', entry.title).strip()
+
+    return fast, title, entry
 
 # ---------- MAIN ----------
 async def filter_fast_streams(input_path, output_path):
-    lines = Path(input_path).read_text(
-        encoding="utf-8", errors="ignore"
-    ).splitlines()
-
-    entries = []
-    extinf, vlcopts = [], []
-
-    for line in lines:
-        if line.startswith("#EXTINF"):
-            extinf = [line]
-        elif line.startswith("#EXTVLCOPT"):
-            vlcopts.append(line)
-        elif line.startswith(("http://", "https://")):
-            entries.append((extinf.copy(), vlcopts.copy(), line.strip()))
-            extinf.clear()
-            vlcopts.clear()
-
-    connector = aiohttp.TCPConnector(limit_per_host=15, ssl=False)
     semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
-
-    async with aiohttp.ClientSession(
-        timeout=TIMEOUT,
-        connector=connector,
-        headers=DEFAULT_HEADERS,
-    ) as session:
-
-        tasks = [check_stream(semaphore, session, e) for e in entries]
-        fast_entries = []
-
-        for coro in asyncio.as_completed(tasks):
-            fast, title, extinf, vlcopts, url = await coro
-            if fast:
-                print(f"✓ FAST: {title}")
-                if extinf:
-                    parts = extinf[0].split(",", 1)
-                    if len(parts) == 2:
-                        new_title = re.sub(r'^\d+\s*', '', parts[1])
-                        extinf[0] = f'{parts[0]} group-title="Fast",{new_title}'
+    deduper = ProbeDeduper()
+
+    with ProbeCache("fast") as cache, HostBreaker(cache.db) as breaker:
+        async with httpclient.async_session(
+            per_host=15, ssl=False, timeout=TIMEOUT, headers=DEFAULT_HEADERS
+        ) as session:
+            prober = HLSProber(
+                session,
+                accept=is_fast,
+                blocked=is_blocked,
+                sample_bytes=SAMPLE_BYTES,
+                warmup_bytes=WARMUP_BYTES,
+                retries=RETRIES,
+                max_depth=MAX_HLS_DEPTH,
+                segments=SAMPLE_SEGMENTS,
+                min_kbps=MIN_SPEED_KBPS,
+                confidence=CONFIDENCE,
+            )
+
+            tasks = (
+                check_stream(semaphore, prober, cache, breaker, deduper, e)
+                for e in parse_file(input_path)
+                if e.url.startswith(("http://", "https://"))
+            )
+
+            # Accepted entries hit <output>.partial as soon as they are probed;
+            # the title-sorted playlist is produced when the writer closes.
+            with SortedPlaylistWriter(output_path) as out:
+                async for fast, title, entry in as_completed_bounded(
+                    tasks, MAX_CONCURRENCY * WINDOW_FACTOR
+                ):
+                    if fast:
+                        print(f"✓ FAST: {title}")
+                        if entry.extinf:
+                            entry.rewrite(title=title, group_title="Fast")
+                        entry.headers = tuple(entry.vlcopts())
+                        out.add(entry)
                     else:
-                        extinf[0] = f'{parts[0]} group-title="Fast"'
-                fast_entries.append((title.lower(), extinf, vlcopts, url))
-            else:
-                print(f"✗ SLOW: {url}")
-
-    fast_entries.sort(key=lambda x: x[0])
+                        print(f"✗ SLOW: {entry.url}")
 
-    out = ["#EXTM3U"]
-    for _, extinf, vlcopts, url in fast_entries:
-        out.extend(extinf)
-        out.extend(vlcopts)
-        out.append(url)
+        cache.report()
+        breaker.report()
+        print(f"📼 Master playlists: {prober.master_fetches} fetched, "
+              f"{prober.master_hits} shared between entries")
+        report_cost()
+        deduper.report()
 
-    Path(output_path).write_text("\n".join(out) + "\n", encoding="utf-8")
     print(f"\nSaved FAST playlist to: {output_path}")
 
 # ---------- CLI ----------